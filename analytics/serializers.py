@@ -1,12 +1,13 @@
 from rest_framework import serializers
+from expenso_backend.sparse_fields import SparseFieldsetsMixin
 from .models import SpendingAnalytics, SpendingRecommendation
 
-class SpendingAnalyticsSerializer(serializers.ModelSerializer):
+class SpendingAnalyticsSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = SpendingAnalytics
         fields = ['week_start', 'total_income', 'total_expenses', 'savings']
 
-class SpendingRecommendationSerializer(serializers.ModelSerializer):
+class SpendingRecommendationSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = SpendingRecommendation
         fields = ['recommendation_text', 'category', 'created_at']
\ No newline at end of file
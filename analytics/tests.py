@@ -1,3 +1,40 @@
+from datetime import date
+
+from django.core.cache import caches
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import User
+from .models import SpendingAnalytics, SpendingRecommendation
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create_user(username='a', email='a@example.com', password='pw123456')
+        other = User.objects.create_user(username='b', email='b@example.com', password='pw123456')
+        SpendingAnalytics.objects.create(user=self.user, week_start=date(2024, 1, 1), total_expenses=120)
+        SpendingAnalytics.objects.create(user=other, week_start=date(2024, 1, 1), total_expenses=90)
+        SpendingRecommendation.objects.create(user=self.user, recommendation_text='Cook more', category='Food')
+        SpendingRecommendation.objects.create(
+            user=self.user, recommendation_text='Old advice', category='Food', is_active=False,
+        )
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_spending_lists_only_the_users_weeks(self):
+        response = self.client.get('/api/analytics/spending/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([week['total_expenses'] for week in response.json()], ['120.00'])
+
+    def test_recommendations_skip_inactive_ones(self):
+        response = self.client.get('/api/analytics/recommendations/')
+        self.assertEqual([row['recommendation_text'] for row in response.json()], ['Cook more'])
 
-# Create your tests here.
+    def test_sparse_fieldsets(self):
+        response = self.client.get('/api/analytics/spending/', {'fields': 'week_start,savings'})
+        self.assertEqual(response.json(), [{'week_start': '2024-01-01', 'savings': '0.00'}])
+        response = self.client.get('/api/analytics/recommendations/', {'exclude': 'nope'})
+        self.assertEqual(response.status_code, 400)
@@ -4,19 +4,22 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.utils import timezone
 from datetime import timedelta
+from expenso_backend.sparse_fields import SparseFieldsetsViewMixin
 from .models import SpendingAnalytics, SpendingRecommendation
 from .serializers import SpendingAnalyticsSerializer, SpendingRecommendationSerializer
 
-class SpendingAnalyticsListView(generics.ListAPIView):
+class SpendingAnalyticsListView(SparseFieldsetsViewMixin, generics.ListAPIView):
     serializer_class = SpendingAnalyticsSerializer
     permission_classes = [IsAuthenticated]
+    use_replica = True
     
     def get_queryset(self):
         return SpendingAnalytics.objects.filter(user=self.request.user)
 
-class SpendingRecommendationListView(generics.ListAPIView):
+class SpendingRecommendationListView(SparseFieldsetsViewMixin, generics.ListAPIView):
     serializer_class = SpendingRecommendationSerializer
     permission_classes = [IsAuthenticated]
+    use_replica = True
     
     def get_queryset(self):
         return SpendingRecommendation.objects.filter(
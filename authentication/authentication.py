@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from expenso_backend.db_router import set_request_user
+
+from .revocation import is_revoked
+
+# Columns loaded for request.user. Rarely used columns such as password are
+# left deferred and only fetched on access.
+USER_CACHE_FIELDS = [
+    'id', 'email', 'username', 'full_name', 'country', 'currency', 'phone', 'profile_picture',
+    'monthly_income', 'estimated_expenses', 'initial_balance', 'card_number',
+    'card_holder_name', 'profile_setup_complete', 'is_active', 'is_staff',
+    'is_superuser', 'updated_at',
+]
+
+
+def _versions():
+    # Versions are shared by all worker processes, so a save on one of them
+    # invalidates the copies cached by every other
+    return caches[settings.AUTH_USER_VERSION_CACHE]
+
+
+def _version_key(user_id):
+    return f'auth-user-version:{user_id}'
+
+
+def _user_key(user_id, version):
+    return f'auth-user:{user_id}:{version}'
+
+
+def invalidate_cached_user(user_id):
+    """Drop every cached copy of a user by bumping its version."""
+    key = _version_key(user_id)
+    try:
+        _versions().incr(key)
+    except ValueError:
+        _versions().set(key, 1, None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user from a short-lived per-process
+    cache instead of querying auth_user on every request.
+
+    Entries are keyed by user id and a version number, kept in the shared
+    cache, that is bumped whenever the user is saved through the profile
+    endpoints, so the next request after a profile change reloads the row in
+    every process.
+
+    Tokens revoked at logout are rejected before the user is resolved.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_revoked(validated_token):
+            raise InvalidToken(_('Token has been revoked'))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        version = _versions().get(_version_key(user_id), 0)
+        key = _user_key(user_id, version)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = self.user_model.objects.only(*USER_CACHE_FIELDS).get(
+                    **{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+            if not user.is_active:
+                raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        set_request_user(user.pk)
+        return user
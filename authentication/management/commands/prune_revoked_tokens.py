@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from authentication.revocation import prune_expired_tokens
+
+class Command(BaseCommand):
+    help = 'Delete revoked-token records whose tokens have already expired'
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_tokens()
+        self.stdout.write(
+            self.style.SUCCESS(f'Pruned {deleted} expired revoked token(s).')
+        )
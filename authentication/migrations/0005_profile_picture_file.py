@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def move_pictures_to_storage(apps, schema_editor):
+    from authentication.pictures import InvalidPicture, decode_data_url, store_profile_picture
+
+    User = apps.get_model('authentication', 'User')
+    users = User.objects.exclude(profile_picture__isnull=True).exclude(profile_picture='')
+    for user in users.only('id', 'profile_picture').iterator(chunk_size=100):
+        try:
+            name = store_profile_picture(decode_data_url(user.profile_picture))
+        except InvalidPicture:
+            # Unreadable pictures are dropped rather than blocking the migration
+            continue
+        User.objects.filter(pk=user.pk).update(profile_picture_file=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_file',
+            field=models.FileField(blank=True, default='', upload_to='avatars/'),
+        ),
+        migrations.RunPython(move_pictures_to_storage, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='profile_picture',
+        ),
+        migrations.RenameField(
+            model_name='user',
+            old_name='profile_picture_file',
+            new_name='profile_picture',
+        ),
+    ]
@@ -26,7 +26,7 @@ class User(AbstractUser):
     country = models.CharField(max_length=2, choices=COUNTRY_CHOICES, default='US')
     currency = models.CharField(max_length=3, blank=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
-    profile_picture = models.TextField(blank=True, null=True)
+    profile_picture = models.FileField(upload_to='avatars/', blank=True, default='')
     monthly_income = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     estimated_expenses = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     initial_balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
@@ -70,4 +70,12 @@ class User(AbstractUser):
     COUNTRY_CURRENCY_MAP = COUNTRY_CURRENCY_MAP
     
     def __str__(self):
-        return f"{self.full_name} ({self.email})"
\ No newline at end of file
+        return f"{self.full_name} ({self.email})"
+
+class RevokedToken(models.Model):
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,68 @@
+"""
+Profile picture storage.
+
+Uploaded pictures are downscaled to a fixed-size JPEG thumbnail and written to
+the default file storage under a content-hash name, so a stored file never
+changes and can be served with immutable cache headers.
+"""
+import base64
+import binascii
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PICTURE_DIR = 'avatars'
+
+
+class InvalidPicture(ValueError):
+    pass
+
+
+def decode_data_url(value):
+    """Return the raw bytes of a base64 data URL (or bare base64 string)."""
+    if value.startswith('data:'):
+        header, _, value = value.partition(',')
+        if ';base64' not in header:
+            raise InvalidPicture('Profile picture must be base64 encoded.')
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidPicture('Profile picture is not valid base64 data.')
+
+
+def make_thumbnail(raw):
+    # Pillow is only needed when a picture is uploaded, so import it lazily.
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    size = settings.PROFILE_PICTURE_SIZE
+    try:
+        with Image.open(BytesIO(raw)) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode != 'RGB':
+                # Flatten transparency onto white rather than black
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                rgba = image.convert('RGBA')
+                background.paste(rgba, mask=rgba.getchannel('A'))
+                image = background
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidPicture('Upload a valid image.')
+
+    output = BytesIO()
+    thumbnail.save(output, format='JPEG', quality=85, optimize=True)
+    return output.getvalue()
+
+
+def store_profile_picture(raw):
+    """Thumbnail an uploaded image and return its storage name."""
+    if len(raw) > settings.PROFILE_PICTURE_MAX_UPLOAD_SIZE:
+        raise InvalidPicture('Profile picture is too large.')
+
+    content = make_thumbnail(raw)
+    name = f'{PICTURE_DIR}/{hashlib.sha256(content).hexdigest()[:32]}.jpg'
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(content))
@@ -0,0 +1,123 @@
+"""
+Token revocation.
+
+Revoked token ids (JTIs) are persisted in RevokedToken. Each process keeps a
+Bloom filter of them so the per-request check is normally a few bit lookups;
+only a filter hit falls through to an exact database lookup. The filter is
+re-synchronized from the table at most every TOKEN_REVOCATION_SYNC_INTERVAL
+seconds, which is how revocations made by other workers become visible.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: derive all k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationFilter:
+    MIN_CAPACITY = 1024
+    SYNC_LOOKBACK = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._min_id = None
+        self._max_id = 0
+        self._synced_at = 0.0
+
+    def _rebuild(self, count):
+        bloom = BloomFilter(max(self.MIN_CAPACITY, count * 2))
+        for jti in RevokedToken.objects.values_list('jti', flat=True).iterator(chunk_size=5000):
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def _is_fresh(self, now):
+        return self._bloom is not None and now - self._synced_at < settings.TOKEN_REVOCATION_SYNC_INTERVAL
+
+    def sync(self):
+        now = time.monotonic()
+        if self._is_fresh(now):
+            return
+        with self._lock:
+            if self._is_fresh(now):
+                return
+            stats = RevokedToken.objects.aggregate(
+                count=models.Count('id'), min_id=models.Min('id'), max_id=models.Max('id'))
+            count, min_id, max_id = stats['count'], stats['min_id'], stats['max_id'] or 0
+
+            # Bloom filters cannot forget, so a compaction (the oldest id moved)
+            # or outgrowing the filter's capacity means starting over.
+            if self._bloom is None or min_id != self._min_id or count > self._bloom.capacity:
+                self._rebuild(count)
+            elif max_id > self._max_id:
+                # Concurrent inserts can commit out of id order, so re-read a
+                # few ids below the last high-water mark; re-adding is harmless.
+                since = self._max_id - self.SYNC_LOOKBACK
+                for jti in RevokedToken.objects.filter(id__gt=since).values_list('jti', flat=True):
+                    self._bloom.add(jti)
+
+            self._min_id, self._max_id = min_id, max_id
+            self._synced_at = now
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self._bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, token):
+        jti = token[api_settings.JTI_CLAIM]
+        expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+        # A concurrent logout may be revoking the same token
+        RevokedToken.objects.bulk_create([RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True)
+        self.sync()
+        with self._lock:
+            self._bloom.add(jti)
+
+
+revocation_filter = RevocationFilter()
+
+
+def is_revoked(token):
+    return revocation_filter.is_revoked(token[api_settings.JTI_CLAIM])
+
+
+def revoke_token(token):
+    revocation_filter.revoke(token)
+
+
+def prune_expired_tokens():
+    """Delete revocations for tokens that have expired anyway. Returns the number removed."""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
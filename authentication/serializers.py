@@ -3,7 +3,36 @@ from django.contrib.auth import authenticate
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import IntegrityError
+from expenso_backend.sparse_fields import SparseFieldsetsMixin
 from .models import User
+from .pictures import InvalidPicture, decode_data_url, store_profile_picture
+
+class ProfilePictureField(serializers.Field):
+    """
+    Accepts an uploaded image or a base64 data URL and stores a thumbnail;
+    represented as the thumbnail's URL.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(value.url) if request else value.url
+
+    def validate_empty_values(self, data):
+        # null clears the picture, like an empty string
+        if data is None:
+            return (True, '')
+        return super().validate_empty_values(data)
+
+    def to_internal_value(self, data):
+        if not data:
+            return ''
+        try:
+            raw = data.read() if hasattr(data, 'read') else decode_data_url(str(data))
+            return store_profile_picture(raw)
+        except InvalidPicture as e:
+            raise serializers.ValidationError(str(e))
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
@@ -66,7 +95,9 @@ class UserLoginSerializer(serializers.Serializer):
             return user
         raise serializers.ValidationError("Invalid email or password.")
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    profile_picture = ProfilePictureField(required=False)
+
     class Meta:
         model = User
         fields = ['email', 'username', 'full_name', 'country', 'currency', 'phone', 'profile_picture', 'monthly_income', 'estimated_expenses', 
@@ -1,3 +1,91 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import revocation
+from .models import RevokedToken, User
+from .revocation import BloomFilter, RevocationFilter, revoke_token
+
+
+class BloomFilterTests(TestCase):
+    def test_added_values_are_always_found(self):
+        bloom = BloomFilter(1000)
+        values = [f'jti-{i}' for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+
+    def test_false_positive_rate_stays_near_the_target(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RevocationTestCase(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        # Each test starts with an empty filter, as a new process would
+        patcher = mock.patch.object(revocation, 'revocation_filter', RevocationFilter())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='a', email='a@example.com', password='pw123456')
+
+    def client_for(self, access):
+        client = APIClient(SERVER_NAME='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client
+
+
+class RevocationTests(RevocationTestCase):
+    def test_revoked_token_is_rejected(self):
+        # Each read of RefreshToken.access_token mints a new token
+        access = RefreshToken.for_user(self.user).access_token
+        client = self.client_for(access)
+        self.assertEqual(client.get('/api/auth/profile/').status_code, 200)
+
+        revoke_token(access)
+        self.assertEqual(client.get('/api/auth/profile/').status_code, 401)
+        self.assertTrue(revocation.is_revoked(access))
+        self.assertFalse(revocation.is_revoked(RefreshToken.for_user(self.user).access_token))
+
+    def test_revoking_twice_keeps_one_row(self):
+        refresh = RefreshToken.for_user(self.user)
+        revoke_token(refresh)
+        revoke_token(refresh)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+    @override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=0)
+    def test_revocations_by_other_processes_are_synced(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.assertFalse(revocation.is_revoked(access))
+        # Another worker's logout only reaches this one through the table
+        RevokedToken.objects.create(jti=access['jti'], expires_at='2100-01-01T00:00Z')
+        self.assertTrue(revocation.is_revoked(access))
+
+
+class LogoutTests(RevocationTestCase):
+    def test_logout_revokes_the_refresh_and_access_tokens(self):
+        refresh = RefreshToken.for_user(self.user)
+        client = self.client_for(refresh.access_token)
+        response = client.post('/api/auth/logout/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+        self.assertTrue(revocation.is_revoked(refresh))
+        self.assertEqual(client.get('/api/auth/profile/').status_code, 401)
+
+    def test_logout_refuses_another_users_refresh_token(self):
+        other = User.objects.create_user(username='b', email='b@example.com', password='pw123456')
+        client = self.client_for(RefreshToken.for_user(self.user).access_token)
+        response = client.post('/api/auth/logout/', {'refresh': str(RefreshToken.for_user(other))}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_logout_rejects_an_invalid_refresh_token(self):
+        client = self.client_for(RefreshToken.for_user(self.user).access_token)
+        response = client.post('/api/auth/logout/', {'refresh': 'not-a-token'}, format='json')
+        self.assertEqual(response.status_code, 400)
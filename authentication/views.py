@@ -1,13 +1,22 @@
 from django.contrib.auth import authenticate
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from expenso_backend.sparse_fields import sparse_fields
+from transactions import balance_index
+from transactions.balances import mark_stale
+from .authentication import CachedJWTAuthentication, invalidate_cached_user
 from .models import User
+from .pictures import PICTURE_DIR
+from .revocation import revoke_token
 from .serializers import UserRegistrationSerializer, UserProfileSerializer
 
 @api_view(['POST'])
@@ -64,30 +73,44 @@ def logout_user(request):
     try:
         refresh_token = request.data.get('refresh')
         if refresh_token:
-            token = RefreshToken(refresh_token)
-            token.blacklist()
+            try:
+                refresh = RefreshToken(refresh_token)
+            except TokenError:
+                return Response({'error': 'Invalid refresh token.'}, status=status.HTTP_400_BAD_REQUEST)
+            if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(getattr(request.user, jwt_settings.USER_ID_FIELD)):
+                return Response({'error': 'Refresh token belongs to another user.'}, status=status.HTTP_403_FORBIDDEN)
+            revoke_token(refresh)
+        # Also revoke the access token used for this request
+        if request.auth is not None:
+            revoke_token(request.auth)
         return Response({'message': 'Logout successful.'}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'error': f'An unexpected error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET', 'PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def get_user_profile(request):
+    fieldset = sparse_fields(request, UserProfileSerializer)
     try:
         user = request.user
         
         if request.method == 'GET':
-            serializer = UserProfileSerializer(user)
+            serializer = UserProfileSerializer(user, fieldset=fieldset)
             return Response({
                 'success': True,
                 'user': serializer.data
             }, status=status.HTTP_200_OK)
             
         elif request.method == 'PUT':
-            serializer = UserProfileSerializer(user, data=request.data, partial=True)
+            serializer = UserProfileSerializer(user, data=request.data, partial=True, fieldset=fieldset)
             if serializer.is_valid():
                 serializer.save()
+                invalidate_cached_user(user.pk)
+                # Every month's balance depends on the opening balance and home currency
+                if {'initial_balance', 'currency', 'country'} & set(request.data):
+                    mark_stale(user)
+                    balance_index.invalidate(user)
                 return Response({
                     'success': True,
                     'message': 'Profile updated successfully',
@@ -124,8 +147,18 @@ def complete_profile_setup(request):
         user.estimated_expenses = data['estimated_expenses']
         user.profile_setup_complete = True
         user.save()
+        invalidate_cached_user(user.pk)
 
         serializer = UserProfileSerializer(user)
         return Response({'message': 'Profile setup completed successfully.', 'user': serializer.data}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'error': f'An unexpected error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def profile_picture_file(request, filename):
+    # Picture names are content hashes, so a URL's content never changes
+    name = f'{PICTURE_DIR}/{filename}'
+    if not default_storage.exists(name):
+        raise Http404('Picture not found.')
+    response = FileResponse(default_storage.open(name), content_type='image/jpeg')
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -0,0 +1,9 @@
+from drf_yasg import openapi
+
+# Referenced by SWAGGER_SETTINGS['DEFAULT_INFO'], so `manage.py generate_swagger`
+# and the development schema view describe the API the same way.
+info = openapi.Info(
+    title="Expenso API",
+    default_version='v1',
+    description="Expense Tracking API",
+)
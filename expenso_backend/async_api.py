@@ -0,0 +1,94 @@
+"""
+Helpers for native async views.
+
+DRF 3.14 views are always synchronous, so the async read endpoints are plain
+Django async views. These helpers give them the same authentication, method
+handling and JSON rendering as their DRF counterparts.
+"""
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+from authentication.authentication import CachedJWTAuthentication
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    """Render `data` exactly as DRF's JSONRenderer would."""
+    content = json.dumps(
+        data,
+        cls=encoders.JSONEncoder,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+    )
+    return HttpResponse(content.encode(), status=status, content_type='application/json', headers=headers)
+
+
+def request_data(request):
+    """The parsed JSON (or form) body of a request, like DRF's request.data."""
+    if request.content_type != 'application/json':
+        return request.POST
+    if not request.body:
+        return {}
+    try:
+        return json.loads(request.body)
+    except ValueError as exc:
+        raise exceptions.ParseError(f'JSON parse error - {exc}')
+
+
+def _error_response(exc, headers=None):
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return json_response(detail, status=exc.status_code, headers=headers)
+
+
+def async_api_view(http_method_names, throttle_classes=()):
+    """
+    Turn an async function into an authenticated API endpoint, equivalent to
+    @api_view + @permission_classes([IsAuthenticated]) (+ @throttle_classes)
+    for sync views.
+    """
+    allowed = [method.upper() for method in http_method_names]
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            authenticator = CachedJWTAuthentication()
+            try:
+                result = await sync_to_async(authenticator.authenticate)(request)
+                if result is None:
+                    raise exceptions.NotAuthenticated()
+            except exceptions.APIException as exc:
+                exc.status_code = status.HTTP_401_UNAUTHORIZED
+                return _error_response(exc, {'WWW-Authenticate': authenticator.authenticate_header(request)})
+            request.user, request.auth = result
+
+            if request.method not in allowed:
+                return json_response(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                    headers={'Allow': ', '.join(allowed)},
+                )
+            throttles = [throttle() for throttle in throttle_classes]
+            denied = [
+                throttle.wait() for throttle in throttles
+                if not await sync_to_async(throttle.allow_request)(request, None)
+            ]
+            if denied:
+                exc = exceptions.Throttled(max((wait for wait in denied if wait is not None), default=None))
+                return _error_response(exc, {'Retry-After': '%d' % exc.wait} if exc.wait else None)
+            try:
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return _error_response(exc)
+
+        # DRF views are CSRF exempt because they authenticate with tokens.
+        # django.views.decorators.csrf.csrf_exempt does not support async
+        # views before Django 5.0, so set the flag directly.
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
@@ -0,0 +1,107 @@
+"""
+Read-replica routing.
+
+When DATABASE_REPLICA_URL is set, reads made while serving a view marked with
+@replica_reads (or a class-based view with `use_replica = True`) go to the
+'replica' database. Everything else uses the primary, including:
+
+- the rest of a request once it has written anything, and
+- every request from a user who wrote within the last REPLICA_STICKY_SECONDS,
+  so users always read their own writes despite replication lag.
+"""
+import contextvars
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+_request_state = contextvars.ContextVar('db_request_state', default=None)
+
+
+class _RequestState:
+    def __init__(self):
+        self.use_replica = False
+        self.user_id = None
+        self.pinned = None
+        self.wrote = False
+
+
+def replica_enabled():
+    return REPLICA in settings.DATABASES
+
+
+def replica_reads(view):
+    """Let the reads of a read-only view go to the replica."""
+    view.use_replica = True
+    return view
+
+
+def _pin_key(user_id):
+    return f'db-primary-pin:{user_id}'
+
+
+def _pin_cache():
+    # Pins must be visible to every worker process
+    return caches[settings.REPLICA_PIN_CACHE]
+
+
+def set_request_user(user_id):
+    """Record the authenticated user of the current request."""
+    state = _request_state.get()
+    if state is not None:
+        state.user_id = user_id
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        # Reads before the user is known (e.g. authentication) stay on the primary
+        if state is None or not state.use_replica or state.wrote or state.user_id is None:
+            return PRIMARY
+        if state.pinned is None:
+            state.pinned = bool(_pin_cache().get(_pin_key(state.user_id)))
+        return PRIMARY if state.pinned else REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Tracks which view is serving the request and pins writers to the primary."""
+
+    def __init__(self, get_response):
+        if not replica_enabled():
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        request.db_state = _RequestState()
+        _request_state.set(request.db_state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        request.db_state.use_replica = (
+            getattr(view_func, 'use_replica', False) or getattr(view_class, 'use_replica', False)
+        )
+
+    def process_response(self, request, response):
+        state = getattr(request, 'db_state', None)
+        if state is not None and state.wrote and state.user_id is not None:
+            _pin_cache().set(_pin_key(state.user_id), True, settings.REPLICA_STICKY_SECONDS)
+        _request_state.set(None)
+        return response
@@ -0,0 +1,64 @@
+"""
+API documentation views.
+
+The OpenAPI schema is generated once at build time into settings.API_SCHEMA_FILE
+(`python manage.py generate_swagger`, run by the Dockerfile next to
+collectstatic) and served from memory. drf_yasg is only imported when a docs
+request arrives, and only introspects the views when there is no pre-built
+schema, as in development.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+_prebuilt_schema = None
+_schema_view = None
+
+
+def _load_prebuilt_schema():
+    global _prebuilt_schema
+    if _prebuilt_schema is None:
+        path = Path(settings.API_SCHEMA_FILE)
+        _prebuilt_schema = path.read_bytes() if path.exists() else b''
+    return _prebuilt_schema
+
+
+def _generated_schema_view():
+    global _schema_view
+    if _schema_view is None:
+        from drf_yasg.views import get_schema_view
+        from rest_framework import permissions
+        from .api_info import info
+
+        _schema_view = get_schema_view(info, public=True, permission_classes=[permissions.AllowAny])
+    return _schema_view.without_ui(cache_timeout=0)
+
+
+def api_schema(request):
+    schema = _load_prebuilt_schema()
+    if schema:
+        response = HttpResponse(schema, content_type='application/json')
+        response['Cache-Control'] = 'public, max-age=3600'
+        return response
+    # No pre-built schema (development): introspect the views on every request
+    return _generated_schema_view()(request, format='.json')
+
+
+def _ui_view(renderer_name):
+    def view(request):
+        from drf_yasg import renderers
+        from .api_info import info
+
+        renderer = getattr(renderers, renderer_name)()
+        context = {'request': request}
+        # The page loads the schema from SPEC_URL, so it does not need it here
+        renderer.set_context(context)
+        context['title'] = info.title
+        return HttpResponse(render_to_string(renderer.template, context, request))
+    return view
+
+
+swagger_ui = _ui_view('SwaggerUIRenderer')
+redoc_ui = _ui_view('ReDocRenderer')
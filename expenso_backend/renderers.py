@@ -0,0 +1,125 @@
+"""
+Columnar JSON for list endpoints.
+
+Views that set `columnar_encodings` offer it next to plain JSON, for clients
+that send `Accept: application/vnd.expenso.columnar+json` (or `?format=columnar`).
+A list of objects is sent as one array per column instead of repeating every
+key on every row:
+
+    {"count": 3, "columns": {
+        "id": {"encoding": "delta", "values": [2700, -1, -1]},
+        "transaction_type": {"encoding": "dictionary", "dictionary": ["expense", "income"], "codes": [0, 0, 1]},
+        "amount": {"encoding": "decimal", "scale": 2, "values": [28957, 450, 300000]},
+        "date": {"encoding": "date-delta", "start": "2026-10-19", "values": [0, 0, -1]},
+        "created_at": {"encoding": "timestamp-delta", "values": [1760888542195744, -2011, -5]},
+        "purpose": {"encoding": "plain", "values": ["Fuel", "Coffee", "Salary"]}
+    }}
+
+Encodings:
+    plain            the values as they are.
+    dictionary       each distinct value once; codes index into it.
+    delta            integers: the first value, then the difference to the previous row.
+    decimal          decimal strings as integers in units of 10**-scale.
+    date-delta       ISO dates as days after the previous row's date (the first row's after `start`).
+    timestamp-delta  ISO UTC datetimes ("...Z") as microseconds since the Unix epoch, delta encoded.
+
+A column whose values don't fit its encoding (nulls, for instance) is sent
+plain. Anything that isn't a list of objects, such as an error response, is
+rendered as plain JSON.
+"""
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from rest_framework.renderers import JSONRenderer
+
+DECIMAL = re.compile(r'-?(0|[1-9][0-9]*)(\.([0-9]+))?')
+DATE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+# The form DRF gives UTC datetimes: microseconds only when non-zero
+TIMESTAMP = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(\.(?!000000)[0-9]{6})?Z')
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _deltas(numbers):
+    previous = 0
+    deltas = []
+    for number in numbers:
+        deltas.append(number - previous)
+        previous = number
+    return deltas
+
+
+def encode_delta(values):
+    if not all(type(value) is int for value in values):
+        return None
+    return {'values': _deltas(values)}
+
+
+def encode_dictionary(values):
+    if not all(isinstance(value, str) for value in values):
+        return None
+    dictionary = {}
+    codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+    return {'dictionary': list(dictionary), 'codes': codes}
+
+
+def encode_decimal(values):
+    matches = [DECIMAL.fullmatch(value) if isinstance(value, str) else None for value in values]
+    if not all(matches):
+        return None
+    scale = len(matches[0].group(3) or '')
+    if any(len(match.group(3) or '') != scale or match.group(0) in ('-0', '-0.' + '0' * scale) for match in matches):
+        return None
+    return {'scale': scale, 'values': [int(value.replace('.', '')) for value in values]}
+
+
+def encode_date_delta(values):
+    if not all(isinstance(value, str) and DATE.fullmatch(value) for value in values):
+        return None
+    ordinals = [date.fromisoformat(value).toordinal() for value in values]
+    deltas = _deltas(ordinals)
+    deltas[0] = 0
+    return {'start': values[0], 'values': deltas}
+
+
+def encode_timestamp_delta(values):
+    if not all(isinstance(value, str) and TIMESTAMP.fullmatch(value) for value in values):
+        return None
+    return {'values': _deltas([(datetime.fromisoformat(value) - EPOCH) // MICROSECOND for value in values])}
+
+
+ENCODERS = {
+    'dictionary': encode_dictionary,
+    'delta': encode_delta,
+    'decimal': encode_decimal,
+    'date-delta': encode_date_delta,
+    'timestamp-delta': encode_timestamp_delta,
+}
+
+
+def encode_columns(rows, encodings):
+    """{'count', 'columns'} for a list of objects with the same keys, or None if they differ."""
+    names = list(rows[0]) if rows else []
+    if any(len(row) != len(names) or any(name not in row for name in names) for row in rows):
+        return None
+    columns = {}
+    for name in names:
+        values = [row[name] for row in rows]
+        encoding = encodings.get(name, 'plain')
+        encoded = ENCODERS[encoding](values) if encoding in ENCODERS else None
+        if encoded is None:
+            encoding, encoded = 'plain', {'values': values}
+        columns[name] = {'encoding': encoding, **encoded}
+    return {'count': len(rows), 'columns': columns}
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.expenso.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        view = (renderer_context or {}).get('view')
+        encodings = getattr(view, 'columnar_encodings', {})
+        if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+            data = encode_columns(data, encodings) or data
+        return super().render(data, accepted_media_type, renderer_context)
@@ -15,6 +15,7 @@ from decouple import config
 from datetime import timedelta
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -49,6 +50,7 @@ INSTALLED_APPS = [
     'transactions',
     'goals',
     'analytics',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -61,6 +63,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'expenso_backend.db_router.ReplicaRoutingMiddleware',
+    'expenso_backend.throttling.ThrottleHeadersMiddleware',
 ]
 
 ROOT_URLCONF = 'expenso_backend.urls'
@@ -82,6 +86,12 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'expenso_backend.wsgi.application'
+ASGI_APPLICATION = 'expenso_backend.asgi.application'
+
+# Serve the read-heavy endpoints (dashboard, monthly statistics, cumulative
+# balance, notifications, savings goals) from native async views. Enable this
+# when running under ASGI, see start_production_asgi.sh.
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
 
 
 # Database
@@ -100,6 +110,31 @@ else:
         }
     }
 
+# Optional read replica for analytics and history reads. Locally it can be a
+# second SQLite file, refreshed with `python manage.py sync_sqlite_replica`.
+if config('DATABASE_REPLICA_URL', default=None):
+    DATABASES['replica'] = dj_database_url.parse(config('DATABASE_REPLICA_URL'))
+    # Tests use the primary for both aliases
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['expenso_backend.db_router.ReplicaRouter']
+
+# Seconds a user's requests stay on the primary after they write
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+REPLICA_PIN_CACHE = 'shared'
+
+# SQLite production profile, applied to every new SQLite connection. WAL lets
+# reads proceed while another worker writes.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),
+}
+# Retries (with backoff starting at SQLITE_WRITE_RETRY_DELAY seconds) for
+# writes that still find the database locked
+SQLITE_WRITE_RETRIES = config('SQLITE_WRITE_RETRIES', default=5, cast=int)
+SQLITE_WRITE_RETRY_DELAY = 0.02
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -140,6 +175,32 @@ STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Media files (uploaded profile pictures)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
+
+# Profile pictures are stored as square JPEG thumbnails of this many pixels
+PROFILE_PICTURE_SIZE = 256
+PROFILE_PICTURE_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+
+# Currency that ExchangeRate.rate values are quoted in
+EXCHANGE_RATE_BASE_CURRENCY = 'USD'
+
+# Transactions older than this many days (rounded back to the start of the
+# month) are moved to the archive table by `manage.py archive_transactions`
+TRANSACTION_ARCHIVE_AFTER_DAYS = config('TRANSACTION_ARCHIVE_AFTER_DAYS', default=730, cast=int)
+
+# API docs: the schema is pre-built into API_SCHEMA_FILE at deploy time
+# (`python manage.py generate_swagger --overwrite openapi.json`)
+API_SCHEMA_FILE = config('API_SCHEMA_FILE', default=str(BASE_DIR / 'openapi.json'))
+SWAGGER_SETTINGS = {
+    'DEFAULT_INFO': 'expenso_backend.api_info.info',
+    'SPEC_URL': 'schema-json',
+}
+REDOC_SETTINGS = {
+    'SPEC_URL': 'schema-json',
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -148,7 +209,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -162,6 +223,75 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Per-user token buckets for each class of throttled endpoint (see
+# expenso_backend/throttling.py): up to `capacity` tokens, refilled at `rate`
+# tokens per second, kept in THROTTLE_CACHE. THROTTLE_ENABLED=False turns them off
+THROTTLE_BUCKETS = {
+    'aggregates': {
+        'capacity': config('THROTTLE_AGGREGATES_CAPACITY', default=60, cast=int),
+        'rate': config('THROTTLE_AGGREGATES_RATE', default=2.0, cast=float),
+    },
+}
+THROTTLE_CACHE = 'shared'
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+
+# How long responses to requests with an Idempotency-Key are kept for replay
+IDEMPOTENCY_KEY_TTL = timedelta(hours=config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int))
+
+# Seconds between re-syncs of each process's revoked-token filter
+TOKEN_REVOCATION_SYNC_INTERVAL = config('TOKEN_REVOCATION_SYNC_INTERVAL', default=5, cast=int)
+
+# Cache Configuration
+# Per-process in-memory cache, used for short-lived lookups such as request.user
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'expenso-default',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Cache shared by all worker processes on the host
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('SHARED_CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    },
+}
+
+# Seconds an authenticated user stays cached between requests, and the cache
+# shared by workers for the versions that invalidate those copies
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)
+AUTH_USER_VERSION_CACHE = 'shared'
+
+# Per-process daily balance indexes (see transactions/balance_index.py): how
+# many users to keep, and the cache shared by workers for their versions
+BALANCE_INDEX_CACHE_SIZE = config('BALANCE_INDEX_CACHE_SIZE', default=256, cast=int)
+BALANCE_INDEX_CACHE = 'shared'
+
+# Background job queue (see jobs/queue.py): threads per run_worker process,
+# seconds an idle thread waits between polls, how long a job may run before
+# another worker takes it over, runs per job, retry backoff bounds in seconds,
+# and how long finished jobs are kept
+JOBS_WORKER_THREADS = config('JOBS_WORKER_THREADS', default=2, cast=int)
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1.0, cast=float)
+JOBS_VISIBILITY_TIMEOUT = timedelta(seconds=config('JOBS_VISIBILITY_TIMEOUT_SECONDS', default=300, cast=int))
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+JOBS_RETRY_BASE_DELAY = config('JOBS_RETRY_BASE_DELAY', default=10, cast=float)
+JOBS_RETRY_MAX_DELAY = config('JOBS_RETRY_MAX_DELAY', default=3600, cast=float)
+JOBS_RETENTION = timedelta(days=config('JOBS_RETENTION_DAYS', default=7, cast=int))
+
+# How long a report job may run before it is assumed lost, and how long finished
+# reports are kept (see transactions/reports.py)
+REPORT_JOB_TIMEOUT = timedelta(minutes=config('REPORT_JOB_TIMEOUT_MINUTES', default=15, cast=int))
+REPORT_RETENTION = timedelta(days=config('REPORT_RETENTION_DAYS', default=7, cast=int))
+
+# Per-process purpose autocomplete indexes (see transactions/suggestions.py):
+# how many users to keep, the cache holding their versions, and the days over
+# which a use's weight halves
+SUGGESTIONS_CACHE_SIZE = config('SUGGESTIONS_CACHE_SIZE', default=256, cast=int)
+SUGGESTIONS_CACHE = 'shared'
+SUGGESTIONS_HALF_LIFE_DAYS = config('SUGGESTIONS_HALF_LIFE_DAYS', default=30, cast=float)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -171,6 +301,11 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = [*default_headers, 'idempotency-key']
+CORS_EXPOSE_HEADERS = [
+    'Retry-After', 'X-RateLimit-Limit', 'X-RateLimit-Remaining', 'Idempotent-Replayed',
+    'X-Total-Count', 'X-Total-Income', 'X-Total-Expenses',
+]
 
 # Production CORS (add your domain)
 if not DEBUG:
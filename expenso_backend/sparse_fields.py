@@ -0,0 +1,101 @@
+"""
+Sparse fieldsets.
+
+`?fields=full_name,currency` limits a response to those fields and
+`?exclude=created_at` drops fields, on endpoints whose serializer uses
+SparseFieldsetsMixin. Only top-level fields can be selected; nested objects
+come back whole. Views that load rows with SparseFieldsetsViewMixin also narrow
+their query with .only(), so unused columns are not fetched either.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+@lru_cache(maxsize=None)
+def readable_fields(serializer_class):
+    """{field name: source} for the fields serializer_class outputs."""
+    return {name: field.source for name, field in serializer_class().fields.items() if not field.write_only}
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def sparse_fields(request, serializer_class):
+    """
+    The set of serializer_class's fields selected by the request's ?fields= and
+    ?exclude=, or None if it selects no subset.
+    """
+    fields, exclude = request.GET.get('fields'), request.GET.get('exclude')
+    if fields is None and exclude is None:
+        return None
+    available = readable_fields(serializer_class)
+    requested = _names(fields) if fields is not None else list(available)
+    excluded = _names(exclude or '')
+    unknown = [name for name in requested + excluded if name not in available]
+    if unknown:
+        raise serializers.ValidationError({
+            'fields': f'Unknown field(s): {", ".join(unknown)}. Available: {", ".join(available)}.'
+        })
+    return frozenset(requested) - frozenset(excluded)
+
+
+def only_fields(queryset, serializer_class, fieldset):
+    """Defer the columns the selected fields don't read. Left as is if a field isn't a plain model field."""
+    if fieldset is None or queryset.query.combinator:
+        return queryset
+    sources = readable_fields(serializer_class)
+    columns = []
+    for name in fieldset:
+        source = sources[name]
+        try:
+            model_field = queryset.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return queryset
+        if not model_field.concrete:
+            return queryset
+        columns.append(source)
+    return queryset.only(*columns or ['pk'])
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin: outputs only the fields selected by `fieldset`, or by the
+    ?fields= / ?exclude= of the request in its context. Input fields are
+    unaffected.
+    """
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        self.fieldset = fieldset
+        super().__init__(*args, **kwargs)
+
+    @property
+    def _selected_fields(self):
+        if '_sparse_fieldset' not in self.__dict__:
+            fieldset = self.fieldset
+            request = self.context.get('request')
+            # Nested serializers share the context but are not filtered
+            if fieldset is None and request is not None and self.root in (self, self.parent):
+                fieldset = sparse_fields(request, type(self))
+            self.__dict__['_sparse_fieldset'] = fieldset
+        return self.__dict__['_sparse_fieldset']
+
+    @property
+    def _readable_fields(self):
+        fieldset = self._selected_fields
+        for field in super()._readable_fields:
+            if fieldset is None or field.field_name in fieldset:
+                yield field
+
+
+class SparseFieldsetsViewMixin:
+    """Generic view mixin: GET requests only load the columns their ?fields= need."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method != 'GET':
+            return queryset
+        serializer_class = self.get_serializer_class()
+        return only_fields(queryset, serializer_class, sparse_fields(self.request, serializer_class))
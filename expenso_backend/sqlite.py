@@ -0,0 +1,50 @@
+"""
+SQLite production profile.
+
+Every new SQLite connection gets the pragmas in settings.SQLITE_PRAGMAS (WAL,
+synchronous=NORMAL, mmap and a busy timeout), so readers no longer block on
+writers. Write endpoints are wrapped in @serialized_write, which runs them one
+at a time per process and retries when another process holds the write lock.
+"""
+import functools
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+# Re-entrant: on_commit callbacks that write run while the lock is still held
+_write_lock = threading.RLock()
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver."""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def serialized_write(func):
+    """
+    Run a write in its own transaction, one at a time per process, retrying
+    with jittered backoff when SQLite reports that the database is locked.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        connection = connections[DEFAULT_DB_ALIAS]
+        # A transaction that is already open cannot be retried from here
+        if connection.vendor != 'sqlite' or connection.in_atomic_block:
+            return func(*args, **kwargs)
+
+        retries = settings.SQLITE_WRITE_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                with _write_lock, transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if 'database is locked' not in str(exc) or attempt == retries:
+                    raise
+            time.sleep(settings.SQLITE_WRITE_RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1))
+    return wrapper
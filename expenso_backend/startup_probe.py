@@ -0,0 +1,48 @@
+"""
+Boots the project the way a WSGI worker does and serves one request.
+
+Run by the startup_profile command in a fresh interpreter (with -X importtime):
+
+    python -m expenso_backend.startup_probe <spawn timestamp> <path>
+
+Prints a JSON object of milestones in milliseconds since the process was spawned.
+"""
+import json
+import os
+import sys
+import time
+from wsgiref.util import setup_testing_defaults
+
+
+def main():
+    spawned, path = float(sys.argv[1]), sys.argv[2]
+    milestones = {}
+
+    def mark(name):
+        milestones[name] = round((time.time() - spawned) * 1000, 1)
+
+    mark('interpreter')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'expenso_backend.settings')
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()
+    mark('setup')
+
+    from django.conf import settings
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    mark('urlconf')
+
+    host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost').lstrip('.')
+    environ = {'PATH_INFO': path, 'HTTP_HOST': host, 'wsgi.url_scheme': 'https'}
+    setup_testing_defaults(environ)
+    statuses = []
+    body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    b''.join(body)
+    mark('first_request')
+    milestones['status'] = int(statuses[0].split()[0])
+
+    print(json.dumps(milestones))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-user token-bucket throttling.
+
+Each user has one bucket per endpoint class (a key of settings.THROTTLE_BUCKETS)
+holding up to `capacity` tokens, refilled at `rate` tokens per second. A
+request spends its endpoint's cost; when the bucket can't cover it the request
+is refused with 429 and a Retry-After of the seconds until it can. Buckets live
+in the cache shared by all worker processes, so a user's budget is the same
+whichever worker serves them. Bucket keys include the database name, so users
+of another database with the same ids (such as a test database) get their own.
+Setting THROTTLE_ENABLED to False admits every request, as the benchmark
+commands do.
+
+    @api_view(['GET'])
+    @permission_classes([IsAuthenticated])
+    @throttle_classes([token_bucket('aggregates', cost=3)])
+    def cumulative_balance_history(request): ...
+
+ThrottleHeadersMiddleware adds X-RateLimit-Limit / X-RateLimit-Remaining to the
+responses of throttled endpoints.
+"""
+import functools
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.throttling import BaseThrottle
+
+_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _database_tag(name):
+    return hashlib.sha1(str(name).encode()).hexdigest()[:8]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    cost = 1
+
+    def __init__(self):
+        bucket = settings.THROTTLE_BUCKETS[self.scope]
+        self.capacity = bucket['capacity']
+        self.rate = bucket['rate']
+        self.seconds = None
+
+    def allow_request(self, request, view):
+        user = request.user
+        if not settings.THROTTLE_ENABLED or not user or not user.is_authenticated:
+            return True
+        cache = caches[settings.THROTTLE_CACHE]
+        database = _database_tag(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+        key = f'throttle:{database}:{self.scope}:{user.pk}'
+        # Only serialized within a process: workers racing on the same
+        # bucket can let a request or two too many through
+        with _lock:
+            now = time.time()
+            tokens, updated = cache.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            allowed = tokens >= self.cost
+            if allowed:
+                tokens -= self.cost
+            # Kept until the bucket would be full again
+            cache.set(key, (tokens, now), math.ceil((self.capacity - tokens) / self.rate) + 1)
+        self.seconds = None if allowed else (self.cost - tokens) / self.rate
+        # Set on the Django request, where the middleware can see it
+        getattr(request, '_request', request).throttle_budget = (self.capacity, math.floor(tokens))
+        return allowed
+
+    def wait(self):
+        return self.seconds
+
+
+def token_bucket(scope, cost=1):
+    """A TokenBucketThrottle spending `cost` tokens from the `scope` bucket."""
+    return type(f'TokenBucketThrottle_{scope}_{cost}', (TokenBucketThrottle,), {'scope': scope, 'cost': cost})
+
+
+class ThrottleHeadersMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        budget = getattr(request, 'throttle_budget', None)
+        if budget is not None:
+            response['X-RateLimit-Limit'], response['X-RateLimit-Remaining'] = budget
+        return response
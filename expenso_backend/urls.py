@@ -15,20 +15,9 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Expenso API",
-        default_version='v1',
-        description="Expense Tracking API",
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-)
+from django.urls import path, re_path, include
+from authentication.views import profile_picture_file
+from . import docs
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -36,6 +25,8 @@ urlpatterns = [
     path('api/transactions/', include('transactions.urls')),
     path('api/goals/', include('goals.urls')),
     path('api/analytics/', include('analytics.urls')),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger.json', docs.api_schema, name='schema-json'),
+    path('swagger/', docs.swagger_ui, name='schema-swagger-ui'),
+    path('redoc/', docs.redoc_ui, name='schema-redoc'),
+    re_path(r'^media/avatars/(?P<filename>[0-9a-f]{32}\.jpg)$', profile_picture_file, name='profile-picture-file'),
 ]
@@ -11,10 +11,12 @@ export default function Navbar({ onMenuClick }) {
   const [showNotifications, setShowNotifications] = useState(false)
   const [dailyExpenseUsed, setDailyExpenseUsed] = useState(false)
   const [selectedDate, setSelectedDate] = useState(new Date().toISOString().split('T')[0])
+  const [purposeSuggestions, setPurposeSuggestions] = useState([])
   const { notifications } = useSelector((state) => state.transactions)
   const { register, handleSubmit, reset, watch } = useForm()
   const dispatch = useDispatch()
   const watchedDate = watch('date')
+  const watchedPurpose = watch('purpose')
 
   const getStoredNotifications = () => {
     const stored = localStorage.getItem('notifications')
@@ -73,6 +75,20 @@ export default function Navbar({ onMenuClick }) {
     }
   }, [watchedDate])
 
+  useEffect(() => {
+    if (!showTransactionForm) return
+    // Wait for a pause in typing before asking for suggestions
+    const timer = setTimeout(async () => {
+      try {
+        const response = await transactionAPI.getPurposeSuggestions(watchedPurpose || '')
+        setPurposeSuggestions(response.data.suggestions)
+      } catch (error) {
+        setPurposeSuggestions([])
+      }
+    }, 150)
+    return () => clearTimeout(timer)
+  }, [showTransactionForm, watchedPurpose])
+
   const checkDailyExpenseUsage = async (date = null) => {
     try {
       const response = await transactionAPI.checkDailyExpenseUsage(date)
@@ -256,8 +272,15 @@ export default function Navbar({ onMenuClick }) {
                   {...register('purpose')}
                   type="text"
                   placeholder="Enter purpose (optional)"
+                  list="purpose-suggestions"
+                  autoComplete="off"
                   className="w-full p-2 border rounded-lg"
                 />
+                <datalist id="purpose-suggestions">
+                  {purposeSuggestions.map((purpose) => (
+                    <option key={purpose} value={purpose} />
+                  ))}
+                </datalist>
               </div>
 
               <div>
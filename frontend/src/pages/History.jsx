@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { ArrowUpRight, ArrowDownLeft, Trash2 } from 'lucide-react'
+import { ArrowUpRight, ArrowDownLeft, Trash2, Search } from 'lucide-react'
 import { toast } from 'react-toastify'
 import { transactionAPI } from '../services/api'
 
@@ -10,6 +10,9 @@ export default function History() {
   const [selectedMonth, setSelectedMonth] = useState(null)
   const [selectedTransactions, setSelectedTransactions] = useState([])
   const [isRegularUser, setIsRegularUser] = useState(false)
+  const [searchQuery, setSearchQuery] = useState('')
+  const [searchResults, setSearchResults] = useState(null)
+  const [searchNext, setSearchNext] = useState(null)
 
   useEffect(() => {
     // Clear any localStorage data that might interfere with user-specific data
@@ -166,6 +169,20 @@ export default function History() {
     }
   }
 
+  const runSearch = async (cursor = null) => {
+    if (!searchQuery.trim()) {
+      setSearchResults(null)
+      return
+    }
+    try {
+      const response = await transactionAPI.searchTransactions({ q: searchQuery, ...(cursor && { cursor }) })
+      setSearchResults(cursor ? [...searchResults, ...response.data.results] : response.data.results)
+      setSearchNext(response.data.next)
+    } catch (error) {
+      toast.error('Search failed')
+    }
+  }
+
   const handleMonthClick = (monthData) => {
     setSelectedMonth(monthData)
     fetchMonthTransactions(monthData.year, monthData.month)
@@ -236,6 +253,43 @@ export default function History() {
     <div className="space-y-6">
       <h1 className="text-3xl font-bold">Transaction History</h1>
 
+      {/* Search */}
+      <div className="card">
+        <form
+          onSubmit={(e) => {
+            e.preventDefault()
+            runSearch()
+          }}
+          className="flex gap-3"
+        >
+          <input
+            type="text"
+            value={searchQuery}
+            onChange={(e) => setSearchQuery(e.target.value)}
+            placeholder="Search transactions by purpose"
+            className="flex-1 p-2 border rounded-lg"
+          />
+          <button type="submit" className="btn-primary flex items-center gap-2">
+            <Search size={16} />
+            Search
+          </button>
+        </form>
+        {searchResults && (
+          <div className="mt-4">
+            {searchResults.length === 0 ? (
+              <div className="text-center py-8 text-gray-500">No matching transactions</div>
+            ) : (
+              <TransactionList transactions={searchResults} />
+            )}
+            {searchNext && (
+              <button onClick={() => runSearch(searchNext)} className="mt-4 w-full text-purple-600 hover:text-purple-800">
+                Load more
+              </button>
+            )}
+          </div>
+        )}
+      </div>
+
       {/* Current Month Stats */}
       <div className="card">
         <h2 className="text-xl font-semibold mb-4">Current Month</h2>
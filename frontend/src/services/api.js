@@ -5,6 +5,9 @@ const API_BASE_URL = import.meta.env.PROD
   ? import.meta.env.VITE_API_URL || 'https://your-backend-url.onrender.com/api'  // Production: backend URL
   : '/api'  // Development: proxy handles this
 
+// Compact transaction lists, decoded by setTransactions in transactionSlice
+const COLUMNAR = { headers: { Accept: 'application/vnd.expenso.columnar+json' } }
+
 const api = axios.create({
   baseURL: API_BASE_URL,
   headers: {
@@ -32,6 +35,19 @@ api.interceptors.response.use(
   }
 )
 
+// POSTs that create records: retried on timeouts and network errors with the
+// same Idempotency-Key, so the server creates the record at most once
+const postIdempotent = async (url, data, retries = 2) => {
+  const config = { headers: { 'Idempotency-Key': crypto.randomUUID() }, timeout: 10000 }
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await api.post(url, data, config)
+    } catch (error) {
+      if (error.response || attempt >= retries) throw error
+    }
+  }
+}
+
 export const authAPI = {
   register: (data) => api.post('/auth/register/', data),
   login: (data) => api.post('/auth/login/', data),
@@ -40,10 +56,15 @@ export const authAPI = {
 }
 
 export const transactionAPI = {
-  getTransactions: () => api.get('/transactions/'),
-  createTransaction: (data) => api.post('/transactions/', data),
+  getTransactions: (params = {}) => api.get('/transactions/', { ...COLUMNAR, params }),
+  createTransaction: (data) => postIdempotent('/transactions/', data),
   deleteTransaction: (id) => api.delete(`/transactions/${id}/delete/`),
-  getHistory: () => api.get('/transactions/history/'),
+  getHistory: () => api.get('/transactions/history/', COLUMNAR),
+  searchTransactions: (params) => api.get('/transactions/search/', { params }),
+  getPurposeSuggestions: (q) => api.get('/transactions/suggestions/', { params: { q } }),
+  createReport: (data) => api.post('/transactions/reports/', data),
+  getReport: (id) => api.get(`/transactions/reports/${id}/`),
+  downloadReport: (id) => api.get(`/transactions/reports/${id}/download/`, { responseType: 'blob' }),
   getDashboard: () => api.get('/transactions/dashboard/'),
   getUserStatistics: (monthlyIncome = 0) => api.post('/transactions/statistics/', { monthly_income: monthlyIncome }),
   getMonthlyStatistics: (year, month, monthlyIncome = 0) => api.post(`/transactions/monthly/${year}/${month}/`, { monthly_income: monthlyIncome }),
@@ -52,7 +73,7 @@ export const transactionAPI = {
   getCumulativeBalance: () => api.get('/transactions/cumulative-balance/'),
   checkDailyExpenseUsage: (date = null) => api.post('/transactions/daily-expense/check/', date ? { date } : {}),
   markDailyExpenseUsed: () => api.post('/transactions/daily-expense/mark/'),
-  addDailyExpenseForDate: (date, amount) => api.post('/transactions/daily-expense/add/', { date, amount }),
+  addDailyExpenseForDate: (date, amount) => postIdempotent('/transactions/daily-expense/add/', { date, amount }),
   checkUserActivity: () => api.get('/transactions/user-activity/'),
   getNotifications: () => api.get('/transactions/notifications/'),
   getMonthlyGoals: (year, month) => api.get(`/transactions/monthly-goals/?year=${year}&month=${month}`),
@@ -1,5 +1,55 @@
 import { createSlice } from '@reduxjs/toolkit'
 
+const pad = (value, width) => String(value).padStart(width, '0')
+
+const undelta = (values) => {
+  let previous = 0
+  return values.map((delta) => (previous += delta))
+}
+
+const decodeColumn = (column) => {
+  switch (column.encoding) {
+    case 'dictionary':
+      return column.codes.map((code) => column.dictionary[code])
+    case 'delta':
+      return undelta(column.values)
+    case 'decimal': {
+      const unit = 10 ** column.scale
+      return column.values.map((value) => {
+        const abs = Math.abs(value)
+        const sign = value < 0 ? '-' : ''
+        return column.scale ? `${sign}${Math.floor(abs / unit)}.${pad(abs % unit, column.scale)}` : `${sign}${abs}`
+      })
+    }
+    case 'date-delta': {
+      const start = column.start && Date.parse(`${column.start}T00:00:00Z`)
+      return undelta(column.values).map((days) => new Date(start + days * 86400000).toISOString().slice(0, 10))
+    }
+    case 'timestamp-delta':
+      return undelta(column.values).map((microseconds) => {
+        const seconds = Math.floor(microseconds / 1e6)
+        const fraction = microseconds - seconds * 1e6
+        const iso = new Date(seconds * 1000).toISOString().slice(0, 19)
+        return fraction ? `${iso}.${pad(fraction, 6)}Z` : `${iso}Z`
+      })
+    default:
+      return column.values
+  }
+}
+
+// Transaction lists requested as application/vnd.expenso.columnar+json
+export const isColumnar = (payload) => Boolean(payload && !Array.isArray(payload) && payload.columns)
+
+export const decodeColumnar = (payload) => {
+  const rows = Array.from({ length: payload.count }, () => ({}))
+  Object.entries(payload.columns).forEach(([name, column]) => {
+    decodeColumn(column).forEach((value, i) => {
+      rows[i][name] = value
+    })
+  })
+  return rows
+}
+
 const transactionSlice = createSlice({
   name: 'transactions',
   initialState: {
@@ -10,8 +60,12 @@ const transactionSlice = createSlice({
     notifications: [],
   },
   reducers: {
-    setTransactions: (state, action) => {
-      state.transactions = action.payload
+    setTransactions: {
+      reducer: (state, action) => {
+        state.transactions = action.payload
+      },
+      // Accepts either a plain list or a columnar response
+      prepare: (payload) => ({ payload: isColumnar(payload) ? decodeColumnar(payload) : payload }),
     },
     addTransaction: (state, action) => {
       state.transactions.unshift(action.payload)
@@ -29,4 +83,4 @@ const transactionSlice = createSlice({
 })
 
 export const { setTransactions, addTransaction, setBalance, setTodaySpending, setNotifications } = transactionSlice.actions
-export default transactionSlice.reducer
\ No newline at end of file
+export default transactionSlice.reducer
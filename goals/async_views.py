@@ -0,0 +1,25 @@
+"""
+Native async version of the savings goal list, routed in place of the DRF
+view when settings.ASYNC_READ_VIEWS is enabled.
+"""
+from asgiref.sync import sync_to_async
+
+from expenso_backend.async_api import async_api_view, json_response
+from expenso_backend.sparse_fields import only_fields, sparse_fields
+from .models import SavingsGoal
+from .serializers import SavingsGoalSerializer
+from .views import SavingsGoalListCreateView
+
+create_savings_goal = SavingsGoalListCreateView.as_view()
+
+
+@async_api_view(['GET', 'POST'])
+async def savings_goal_list(request):
+    if request.method == 'POST':
+        # Writes stay on the synchronous DRF view
+        return await sync_to_async(create_savings_goal)(request)
+
+    fieldset = sparse_fields(request, SavingsGoalSerializer)
+    goals = only_fields(SavingsGoal.objects.filter(user=request.user), SavingsGoalSerializer, fieldset)
+    goals = [goal async for goal in goals]
+    return json_response(SavingsGoalSerializer(goals, many=True, fieldset=fieldset).data)
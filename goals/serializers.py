@@ -1,25 +1,26 @@
 from rest_framework import serializers
+from expenso_backend.sparse_fields import SparseFieldsetsMixin
 from .models import SavingsGoal, Challenge, UserChallenge, RewardPoints
 
-class SavingsGoalSerializer(serializers.ModelSerializer):
+class SavingsGoalSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = SavingsGoal
         fields = ['id', 'target_amount', 'current_amount', 'month', 'is_achieved']
         read_only_fields = ['id', 'is_achieved']
 
-class ChallengeSerializer(serializers.ModelSerializer):
+class ChallengeSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Challenge
         fields = ['id', 'title', 'description', 'reward_points', 'target_amount']
 
-class UserChallengeSerializer(serializers.ModelSerializer):
+class UserChallengeSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     challenge = ChallengeSerializer(read_only=True)
     
     class Meta:
         model = UserChallenge
         fields = ['id', 'challenge', 'is_completed', 'completed_at']
 
-class RewardPointsSerializer(serializers.ModelSerializer):
+class RewardPointsSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = RewardPoints
         fields = ['total_points']
\ No newline at end of file
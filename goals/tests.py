@@ -1,3 +1,48 @@
-from django.test import TestCase
+import json
+from datetime import date
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import User
+from .async_views import savings_goal_list
+from .models import SavingsGoal
+
+
+class SavingsGoalTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create_user(username='a', email='a@example.com', password='pw123456')
+        other = User.objects.create_user(username='b', email='b@example.com', password='pw123456')
+        SavingsGoal.objects.create(user=self.user, target_amount=500, month=date(2024, 1, 1))
+        SavingsGoal.objects.create(user=self.user, target_amount=800, month=date(2024, 2, 1))
+        SavingsGoal.objects.create(user=other, target_amount=100, month=date(2024, 1, 1))
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def async_get(self, path):
+        request = RequestFactory().get(path, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return async_to_sync(savings_goal_list)(request)
+
+    def test_list_shows_only_the_users_goals(self):
+        response = self.client.get('/api/goals/savings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual([goal['target_amount'] for goal in response.json()], ['500.00', '800.00'])
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get('/api/goals/savings/', {'fields': 'id,target_amount'})
+        self.assertEqual({frozenset(goal) for goal in response.json()}, {frozenset(['id', 'target_amount'])})
+        response = self.client.get('/api/goals/savings/', {'fields': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_list_matches_the_sync_view(self):
+        for query in ['', '?fields=id,month', '?exclude=is_achieved']:
+            sync = self.client.get('/api/goals/savings/' + query)
+            response = self.async_get('/api/goals/savings/' + query)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertCountEqual(json.loads(response.content), sync.json())
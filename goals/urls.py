@@ -1,8 +1,14 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import savings_goal_list
+else:
+    savings_goal_list = views.SavingsGoalListCreateView.as_view()
+
 urlpatterns = [
-    path('savings/', views.SavingsGoalListCreateView.as_view(), name='savings-goals'),
+    path('savings/', savings_goal_list, name='savings-goals'),
     path('challenges/', views.ChallengeListView.as_view(), name='challenges'),
     path('user-challenges/', views.UserChallengeListView.as_view(), name='user-challenges'),
     path('rewards/', views.reward_points, name='reward-points'),
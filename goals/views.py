@@ -3,10 +3,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.utils import timezone
+from expenso_backend.sparse_fields import SparseFieldsetsViewMixin, sparse_fields
 from .models import SavingsGoal, Challenge, UserChallenge, RewardPoints
 from .serializers import SavingsGoalSerializer, ChallengeSerializer, UserChallengeSerializer, RewardPointsSerializer
 
-class SavingsGoalListCreateView(generics.ListCreateAPIView):
+class SavingsGoalListCreateView(SparseFieldsetsViewMixin, generics.ListCreateAPIView):
     serializer_class = SavingsGoalSerializer
     permission_classes = [IsAuthenticated]
     
@@ -16,14 +17,14 @@ class SavingsGoalListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class ChallengeListView(generics.ListAPIView):
+class ChallengeListView(SparseFieldsetsViewMixin, generics.ListAPIView):
     serializer_class = ChallengeSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         return Challenge.objects.filter(is_active=True)
 
-class UserChallengeListView(generics.ListAPIView):
+class UserChallengeListView(SparseFieldsetsViewMixin, generics.ListAPIView):
     serializer_class = UserChallengeSerializer
     permission_classes = [IsAuthenticated]
     
@@ -34,5 +35,5 @@ class UserChallengeListView(generics.ListAPIView):
 @permission_classes([IsAuthenticated])
 def reward_points(request):
     points, created = RewardPoints.objects.get_or_create(user=request.user)
-    serializer = RewardPointsSerializer(points)
+    serializer = RewardPointsSerializer(points, fieldset=sparse_fields(request, RewardPointsSerializer))
     return Response(serializer.data)
\ No newline at end of file
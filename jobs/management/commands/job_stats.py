@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from jobs import queue
+
+class Command(BaseCommand):
+    help = 'Show the background job queue depth and recent outcomes per task'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60, help='Window of finished jobs to report on')
+
+    def handle(self, *args, **options):
+        metrics = queue.metrics(timedelta(minutes=options['minutes']))
+        depth = metrics['depth']
+        self.stdout.write(
+            f'Queue: {depth.get("queued", 0)} queued, {depth.get("running", 0)} running, '
+            f'{depth.get("done", 0)} done, {depth.get("failed", 0)} failed; '
+            f'oldest due job waiting {metrics["lag"].total_seconds():.1f}s'
+        )
+        for row in metrics['tasks']:
+            average = row['average_run'].total_seconds() if row['average_run'] else 0
+            self.stdout.write(
+                f'  {row["task"]}: {row["done"]} done, {row["failed"]} failed, '
+                f'{row["retries"] or 0} retries, {average:.3f}s average run'
+            )
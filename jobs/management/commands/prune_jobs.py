@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from jobs import queue
+
+class Command(BaseCommand):
+    help = 'Delete finished background jobs past their retention period'
+
+    def handle(self, *args, **options):
+        deleted = queue.prune()
+        self.stdout.write(
+            self.style.SUCCESS(f'Pruned {deleted} job(s).')
+        )
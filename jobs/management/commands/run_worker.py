@@ -0,0 +1,43 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from jobs import queue
+from jobs.worker import Worker
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs until stopped (SIGINT/SIGTERM let running jobs finish)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=settings.JOBS_WORKER_THREADS,
+                            help='Jobs run at once by this process')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no job is due, instead of waiting for more')
+        parser.add_argument('--stats-interval', type=float, default=60,
+                            help='Seconds between metrics reports')
+
+    def handle(self, *args, **options):
+        worker = Worker(options['threads'], burst=options['burst'])
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+
+        started = time.monotonic()
+        worker.start()
+        self.stdout.write(f'Worker {worker.name} running {options["threads"]} threads.')
+        while not worker.join(timeout=options['stats_interval']):
+            self.report(worker, time.monotonic() - started)
+        self.report(worker, time.monotonic() - started)
+        self.stdout.write(self.style.SUCCESS('Worker stopped.'))
+
+    def report(self, worker, elapsed):
+        counts, busy = worker.stats()
+        processed = sum(counts.values())
+        metrics = queue.metrics()
+        self.stdout.write(
+            f'{processed} jobs in {elapsed:.0f}s ({processed / max(elapsed, 1e-9):.1f}/s): '
+            f'{counts.get("done", 0)} done, {counts.get("retried", 0)} retried, {counts.get("failed", 0)} failed; '
+            f'threads busy {busy / max(elapsed * worker.threads, 1e-9):.0%}; '
+            f'queue {metrics["depth"].get("queued", 0)} queued, {metrics["depth"].get("running", 0)} running, '
+            f'lag {metrics["lag"].total_seconds():.1f}s'
+        )
@@ -0,0 +1,245 @@
+"""
+Background jobs, queued in the application database.
+
+    @task(max_attempts=3)
+    def repair_user(user_id): ...
+
+    repair_user.enqueue(user_id=user.pk)
+
+enqueue() inserts a Job once the caller's transaction commits (at once outside
+one), so workers never run a job before the writes it depends on are visible,
+and nothing is queued if they roll back. The view returns without waiting for
+the job. A process that dies between the commit and the insert loses the job,
+so callers must cope with a job that never arrives. A job names its task by
+import path, so workers find any function decorated with @task.
+
+Workers (the run_worker command) claim due jobs one at a time. Where the
+database has SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL), a claim skips
+rows other workers are claiming rather than waiting for them. SQLite has no
+row locks, so a claim is an UPDATE conditional on the job still being due,
+which only one competing worker can win.
+
+A claimed job is leased for its task's timeout; if its worker dies, the lease
+runs out and another worker takes the job over. A task that raises is retried
+with exponential backoff and jitter, up to max_attempts, then left failed
+with its traceback, and its task's on_failure hook (if any) is called. Tasks
+may therefore run more than once and must be safe to repeat.
+"""
+import functools
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Min, Q, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from expenso_backend.sqlite import serialized_write
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Due jobs a SQLite claim reads at a time, in case other workers win the first ones
+CLAIM_CANDIDATES = 10
+
+
+class Task:
+    """A function that can also be run in the background, with enqueue()."""
+
+    def __init__(self, func, max_attempts=None, timeout=None, on_failure=None):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self._max_attempts = max_attempts
+        self._timeout = timeout
+        self.on_failure = on_failure
+
+    @property
+    def max_attempts(self):
+        return self._max_attempts or settings.JOBS_MAX_ATTEMPTS
+
+    @property
+    def timeout(self):
+        return self._timeout or settings.JOBS_VISIBILITY_TIMEOUT
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, delay=None, unique=False, **kwargs):
+        """
+        Queue a call with JSON-serializable `kwargs` once the current transaction
+        commits, to run after `delay` (a timedelta) if given. With `unique`, the
+        call is dropped if the same one is already waiting to run.
+        """
+        @serialized_write
+        def insert():
+            if unique and self.waiting(kwargs):
+                return
+            Job.objects.create(task=self.name, kwargs=kwargs, run_at=timezone.now() + (delay or timedelta()))
+        # A failed insert is logged rather than failing a request whose writes have committed
+        transaction.on_commit(insert, robust=True)
+
+    def waiting(self, kwargs, statuses=('queued',)):
+        """Whether a call with exactly these `kwargs` has a job in one of `statuses`."""
+        return Job.objects.filter(task=self.name, kwargs=kwargs, status__in=statuses).exists()
+
+
+def task(func=None, *, max_attempts=None, timeout=None, on_failure=None):
+    """
+    Make a function enqueueable. `timeout` is how long a run may take before
+    the job is handed to another worker, and `max_attempts` how many runs it
+    gets; both default to settings.JOBS_*. `on_failure(kwargs, error)` is
+    called once a job has failed for good.
+    """
+    if func is None:
+        return lambda func: Task(func, max_attempts, timeout, on_failure)
+    return Task(func, max_attempts, timeout, on_failure)
+
+
+def _task(job):
+    try:
+        found = import_string(job.task)
+    except ImportError:
+        return None
+    return found if isinstance(found, Task) else None
+
+
+def _due(now):
+    # Running jobs whose lease has run out are due again
+    return Job.objects.filter(status__in=['queued', 'running'], run_at__lte=now).order_by('run_at', 'id')
+
+
+def _lease(job, worker, now):
+    """Field values claiming `job` for `worker`, or failing it if it has no runs left."""
+    found = _task(job)
+    if found is None:
+        return {'status': 'failed', 'finished_at': now, 'last_error': f'Unknown task {job.task}'}
+    if job.attempts >= found.max_attempts:
+        # Only reachable by a lease running out: failed runs are counted when they fail
+        return {'status': 'failed', 'finished_at': now, 'last_error': job.last_error or 'Lease expired'}
+    return {
+        'status': 'running',
+        'attempts': job.attempts + 1,
+        'run_at': now + found.timeout,
+        'worker': worker,
+        'started_at': now,
+    }
+
+
+def _give_up(found, job, error):
+    if found is None or found.on_failure is None:
+        return
+    try:
+        found.on_failure(job.kwargs, error)
+    except Exception:
+        logger.exception('on_failure of job %s (%s) raised', job.pk, job.task)
+
+
+def _claimed(job, fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return job
+
+
+@serialized_write
+def _take(job, fields):
+    # Matches nothing if another worker changed the job since it was read
+    return Job.objects.filter(pk=job.pk, status=job.status, run_at=job.run_at).update(**fields)
+
+
+def claim(worker):
+    """Lease the next due job to `worker`. Returns the job, or None if nothing is due."""
+    now = timezone.now()
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            for job in _due(now).select_for_update(skip_locked=True)[:CLAIM_CANDIDATES]:
+                fields = _lease(job, worker, now)
+                Job.objects.filter(pk=job.pk).update(**fields)
+                if fields['status'] == 'running':
+                    return _claimed(job, fields)
+                transaction.on_commit(functools.partial(_give_up, _task(job), job, fields['last_error']))
+        return None
+
+    # Candidates are read outside the write: a SQLite transaction that reads
+    # before writing can't wait out another process's write, only fail.
+    # Losing every candidate to other workers means they made progress, so
+    # read the next ones rather than reporting an empty queue.
+    while True:
+        candidates = list(_due(now)[:CLAIM_CANDIDATES])
+        if not candidates:
+            return None
+        for job in candidates:
+            fields = _lease(job, worker, now)
+            if not _take(job, fields):
+                continue
+            if fields['status'] == 'running':
+                return _claimed(job, fields)
+            _give_up(_task(job), job, fields['last_error'])
+
+
+def backoff(attempts):
+    """Delay before retrying a job that has failed `attempts` times."""
+    seconds = min(settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.JOBS_RETRY_MAX_DELAY)
+    return timedelta(seconds=seconds * random.uniform(0.5, 1))
+
+
+@serialized_write
+def _record(job, **fields):
+    # A worker whose lease ran out no longer owns the job
+    return Job.objects.filter(pk=job.pk, worker=job.worker, attempts=job.attempts).update(**fields)
+
+
+def run(job):
+    """Run a claimed job and record the outcome: 'done', 'retried' or 'failed'."""
+    found = _task(job)
+    try:
+        if found is None:
+            raise LookupError(f'Unknown task {job.task}')
+        found.func(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if found is not None and job.attempts < found.max_attempts:
+            _record(job, status='queued', run_at=now + backoff(job.attempts), last_error=error)
+            return 'retried'
+        if _record(job, status='failed', finished_at=now, last_error=error):
+            _give_up(found, job, error)
+        return 'failed'
+    _record(job, status='done', finished_at=timezone.now(), last_error='')
+    return 'done'
+
+
+def metrics(window=timedelta(hours=1)):
+    """Queue depth, and per-task outcomes of the jobs finished within `window`."""
+    now = timezone.now()
+    depth = dict(Job.objects.order_by().values_list('status').annotate(Count('id')))
+    oldest = _due(now).filter(status='queued').aggregate(oldest=Min('run_at'))['oldest']
+    tasks = (
+        Job.objects.filter(finished_at__gte=now - window)
+        .order_by()
+        .values('task')
+        .annotate(
+            done=Count('id', filter=Q(status='done')),
+            failed=Count('id', filter=Q(status='failed')),
+            retries=Sum(F('attempts') - 1, filter=Q(attempts__gt=0)),
+            average_run=Avg(F('finished_at') - F('started_at')),
+        )
+        .order_by('task')
+    )
+    return {
+        'depth': depth,
+        # How long the longest-waiting due job has been waiting
+        'lag': now - oldest if oldest else timedelta(),
+        'tasks': list(tasks),
+    }
+
+
+def prune():
+    """Delete finished jobs older than settings.JOBS_RETENTION. Returns the number removed."""
+    cutoff = timezone.now() - settings.JOBS_RETENTION
+    deleted, _ = Job.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff).delete()
+    return deleted
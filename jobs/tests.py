@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+from .queue import task
+
+calls = []
+failures = []
+
+
+@task(timeout=timedelta(seconds=30))
+def record(value):
+    calls.append(value)
+
+
+def give_up(kwargs, error):
+    failures.append((kwargs, error))
+
+
+@task(max_attempts=2, on_failure=give_up)
+def explode(value):
+    raise RuntimeError(value)
+
+
+class QueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+        failures.clear()
+
+    def enqueue(self, func, **kwargs):
+        # TestCase never commits, so run the on_commit insert by hand
+        with self.captureOnCommitCallbacks(execute=True):
+            func.enqueue(**kwargs)
+        return Job.objects.latest('id')
+
+    def make_due(self, job):
+        # Ends a running job's lease, or a queued job's retry delay
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now() - timedelta(seconds=1))
+
+
+class ClaimTests(QueueTestCase):
+    def test_claim_leases_the_oldest_due_job(self):
+        first = self.enqueue(record, value=1)
+        self.enqueue(record, value=2)
+        self.enqueue(record, value=3, delay=timedelta(hours=1))
+
+        job = queue.claim('w1')
+        self.assertEqual(job.pk, first.pk)
+        stored = Job.objects.get(pk=first.pk)
+        self.assertEqual((stored.status, stored.worker, stored.attempts), ('running', 'w1', 1))
+        self.assertGreater(stored.run_at, timezone.now() + timedelta(seconds=25))
+
+        self.assertEqual(queue.claim('w2').kwargs, {'value': 2})
+        # The delayed job is not due yet
+        self.assertIsNone(queue.claim('w3'))
+
+    def test_run_records_success(self):
+        self.enqueue(record, value='x')
+        job = queue.claim('w1')
+        self.assertEqual(queue.run(job), 'done')
+        self.assertEqual(calls, ['x'])
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'done')
+
+    def test_unknown_task_fails(self):
+        Job.objects.create(task='jobs.tests.missing', run_at=timezone.now())
+        self.assertIsNone(queue.claim('w1'))
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Unknown task', job.last_error)
+
+    def test_unique_skips_a_waiting_duplicate(self):
+        self.enqueue(record, value=1, unique=True)
+        self.enqueue(record, value=1, unique=True)
+        self.enqueue(record, value=2, unique=True)
+        self.assertEqual(Job.objects.count(), 2)
+
+
+@override_settings(JOBS_RETRY_BASE_DELAY=10, JOBS_RETRY_MAX_DELAY=60)
+class RetryTests(QueueTestCase):
+    def test_backoff_doubles_up_to_the_maximum(self):
+        for attempts, full in [(1, 10), (2, 20), (3, 40), (4, 60), (10, 60)]:
+            delay = queue.backoff(attempts).total_seconds()
+            self.assertTrue(full / 2 <= delay <= full, (attempts, delay))
+
+    def test_failed_run_is_retried_then_given_up(self):
+        self.enqueue(explode, value='boom')
+
+        job = queue.claim('w1')
+        self.assertEqual(queue.run(job), 'retried')
+        retried = Job.objects.get(pk=job.pk)
+        self.assertEqual(retried.status, 'queued')
+        self.assertGreater(retried.run_at, timezone.now())
+        self.assertIn('RuntimeError: boom', retried.last_error)
+        self.assertEqual(failures, [])
+
+        self.make_due(retried)
+        job = queue.claim('w1')
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(queue.run(job), 'failed')
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'failed')
+        self.assertEqual(failures[0][0], {'value': 'boom'})
+
+
+class LeaseTests(QueueTestCase):
+    def test_expired_lease_is_taken_over(self):
+        self.enqueue(record, value=1)
+        lost = queue.claim('w1')
+        self.make_due(lost)
+
+        job = queue.claim('w2')
+        self.assertEqual((job.pk, job.worker, job.attempts), (lost.pk, 'w2', 2))
+        # The first worker no longer owns the job, so its outcome is dropped
+        self.assertEqual(queue.run(lost), 'done')
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'running')
+        queue.run(job)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'done')
+
+    def test_expired_last_lease_fails_the_job(self):
+        self.enqueue(explode, value='lost')
+        for _ in range(2):
+            self.make_due(queue.claim('w1'))
+        self.assertIsNone(queue.claim('w1'))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.last_error), ('failed', 'Lease expired'))
+        self.assertEqual(failures, [({'value': 'lost'}, 'Lease expired')])
+
+
+class PruneTests(QueueTestCase):
+    @override_settings(JOBS_RETENTION=timedelta(days=7))
+    def test_prune_deletes_old_finished_jobs(self):
+        now = timezone.now()
+        old = now - timedelta(days=8)
+        Job.objects.create(task='t', status='done', run_at=old, finished_at=old)
+        Job.objects.create(task='t', status='failed', run_at=old, finished_at=old)
+        recent = Job.objects.create(task='t', status='done', run_at=now, finished_at=now)
+        queued = Job.objects.create(task='t', status='queued', run_at=old)
+
+        self.assertEqual(queue.prune(), 2)
+        self.assertCountEqual(Job.objects.values_list('pk', flat=True), [recent.pk, queued.pk])
+
+
+class EnqueueTransactionTests(TransactionTestCase):
+    def test_job_is_inserted_when_the_transaction_commits(self):
+        with transaction.atomic():
+            record.enqueue(value=1)
+            self.assertFalse(Job.objects.exists())
+        self.assertEqual(Job.objects.get().kwargs, {'value': 1})
+
+    def test_rolled_back_transaction_queues_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                record.enqueue(value=1)
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
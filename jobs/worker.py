@@ -0,0 +1,82 @@
+"""
+Worker threads for the run_worker command.
+
+Each thread claims and runs one job at a time (see queue.py), sleeping a
+jittered settings.JOBS_POLL_INTERVAL whenever nothing is due, so idle workers
+on several hosts don't poll in step. Run the command on as many processes or
+hosts as needed: claims are safe across all of them.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self, threads, burst=False):
+        self.threads = threads
+        # Stop once nothing is due instead of waiting for more
+        self.burst = burst
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.counts = Counter()
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _loop(self, index):
+        worker = f'{self.name}:{index}'
+        try:
+            while not self.stopping.is_set():
+                try:
+                    job = queue.claim(worker)
+                except Exception:
+                    logger.exception('%s could not claim a job', worker)
+                    connection.close_if_unusable_or_obsolete()
+                    job = None
+                if job is None:
+                    if self.burst:
+                        return
+                    self.stopping.wait(settings.JOBS_POLL_INTERVAL * random.uniform(0.5, 1.5))
+                    continue
+
+                started = time.monotonic()
+                outcome = queue.run(job)
+                elapsed = time.monotonic() - started
+                logger.info('%s %s job %s (%s) in %.3fs', worker, outcome, job.pk, job.task, elapsed)
+                with self._lock:
+                    self.counts[outcome] += 1
+                    self.busy_seconds += elapsed
+        finally:
+            connection.close()
+
+    def start(self):
+        for index in range(self.threads):
+            thread = threading.Thread(target=self._loop, args=(index,), name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Let each thread finish its current job, then exit."""
+        self.stopping.set()
+
+    def join(self, timeout=None):
+        """Wait up to `timeout` seconds for the threads to exit. Returns True once they all have."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts), self.busy_seconds
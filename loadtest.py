@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+"""
+Load-test harness for the Expenso API.
+
+Logs in a pool of synthetic users and replays weighted scenarios against a
+running server from a single asyncio event loop, then prints a JSON report with
+per-endpoint latency percentiles, throughput and error rates.
+
+Only the standard library is used, so it runs anywhere the backend does:
+
+    python manage.py runserver            # or gunicorn, see DEPLOYMENT.md
+    python loadtest.py --users 50 --duration 30 --output run.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import ssl
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+DEFAULT_WEIGHTS = {
+    'dashboard': 5,
+    'add_transaction': 3,
+    'history': 2,
+    'login_storm': 1,
+}
+
+PURPOSES = ['Groceries', 'Rent', 'Coffee', 'Fuel', 'Salary', 'Dining out', 'Utilities', 'Gym']
+
+
+class HTTPError(Exception):
+    pass
+
+
+class Connection:
+    """A minimal keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.secure = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.secure else 80)
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        ssl_context = ssl.create_default_context() if self.secure else None
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl_context), self.timeout)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, token=None):
+        payload = json.dumps(body).encode() if body is not None else b''
+        headers = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+            f'Content-Length: {len(payload)}',
+        ]
+        if body is not None:
+            headers.append('Content-Type: application/json')
+        if token:
+            headers.append(f'Authorization: Bearer {token}')
+        raw = ('\r\n'.join(headers) + '\r\n\r\n').encode() + payload
+
+        # A pooled connection may have been closed by the server between
+        # requests; retry once on a fresh socket before giving up.
+        for attempt in range(2):
+            if self.writer is None:
+                await self._connect()
+            try:
+                self.writer.write(raw)
+                await self.writer.drain()
+                return await asyncio.wait_for(self._read_response(), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+            except Exception:
+                await self.close()
+                raise
+
+    async def _read_response(self):
+        status_line = await self.reader.readuntil(b'\r\n')
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HTTPError(f'Malformed status line: {status_line!r}')
+
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b'\r\n')
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, headers, body
+
+
+class Metrics:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, label, elapsed, status):
+        self.latencies[label].append(elapsed)
+        self.statuses[label][str(status)] += 1
+        if status == 'error' or status >= 400:
+            self.errors[label] += 1
+
+    def report(self, duration):
+        endpoints = {}
+        for label in sorted(self.latencies):
+            samples = sorted(self.latencies[label])
+            count = len(samples)
+            endpoints[label] = {
+                'requests': count,
+                'errors': self.errors[label],
+                'error_rate': round(self.errors[label] / count, 4),
+                'throughput_rps': round(count / duration, 2),
+                'statuses': dict(self.statuses[label]),
+                'latency_ms': {
+                    'p50': percentile(samples, 50),
+                    'p95': percentile(samples, 95),
+                    'p99': percentile(samples, 99),
+                    'mean': round(sum(samples) / count * 1000, 2),
+                    'max': round(samples[-1] * 1000, 2),
+                },
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        errors = sum(self.errors.values())
+        return {
+            'requests': total,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'throughput_rps': round(total / duration, 2),
+            'endpoints': endpoints,
+        }
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of pre-sorted samples, in milliseconds."""
+    if not sorted_samples:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_samples)) - 1)
+    return round(sorted_samples[rank] * 1000, 2)
+
+
+class VirtualUser:
+    def __init__(self, index, args, metrics):
+        self.email = f'{args.email_prefix}+{index}@example.com'
+        self.password = args.password
+        self.args = args
+        self.metrics = metrics
+        self.conn = Connection(args.base_url, args.timeout)
+        self.token = None
+        self.rng = random.Random(args.seed + index)
+
+    async def call(self, method, path, label=None, body=None, auth=True):
+        label = f'{method} {label or path}'
+        start = time.perf_counter()
+        try:
+            status, _, raw = await self.conn.request(method, path, body, self.token if auth else None)
+        except Exception:
+            self.metrics.record(label, time.perf_counter() - start, 'error')
+            return None, None
+        self.metrics.record(label, time.perf_counter() - start, status)
+        try:
+            return status, json.loads(raw) if raw else None
+        except ValueError:
+            return status, None
+
+    async def login(self, record=True):
+        body = {'email': self.email, 'password': self.password}
+        if record:
+            status, data = await self.call('POST', '/api/auth/login/', body=body, auth=False)
+        else:
+            status, _, raw = await self.conn.request('POST', '/api/auth/login/', body)
+            data = json.loads(raw) if raw else None
+        if status == 200 and data:
+            self.token = data['access']
+        return status
+
+    async def setup(self):
+        """Log in, registering the account first if it does not exist yet."""
+        if await self.login(record=False) == 200:
+            return True
+        status, _, _ = await self.conn.request('POST', '/api/auth/register/', {
+            'email': self.email,
+            'password': self.password,
+            'full_name': 'Load Test User',
+            'country': 'US',
+        })
+        if status not in (200, 201):
+            return False
+        return await self.login(record=False) == 200
+
+    # Scenarios
+
+    async def dashboard(self):
+        today = date.today()
+        await self.call('GET', '/api/transactions/dashboard/')
+        await self.call('POST', f'/api/transactions/monthly/{today.year}/{today.month}/',
+                        label='/api/transactions/monthly/{year}/{month}/', body={})
+        await self.call('GET', '/api/transactions/cumulative-balance/')
+        await self.call('GET', '/api/transactions/notifications/')
+
+    async def add_transaction(self):
+        days_back = self.rng.randint(0, 90)
+        await self.call('POST', '/api/transactions/', body={
+            'transaction_type': self.rng.choice(['income', 'expense', 'expense', 'expense']),
+            'amount': f'{self.rng.uniform(1, 500):.2f}',
+            'purpose': self.rng.choice(PURPOSES),
+            'date': (date.today() - timedelta(days=days_back)).isoformat(),
+        })
+
+    async def history(self):
+        await self.call('GET', '/api/transactions/history/')
+        await self.call('GET', '/api/transactions/')
+
+    async def login_storm(self):
+        for _ in range(self.args.login_burst):
+            await self.login()
+
+    async def run(self, weights, deadline):
+        names = list(weights)
+        scenario_weights = list(weights.values())
+        while time.monotonic() < deadline:
+            scenario = self.rng.choices(names, weights=scenario_weights)[0]
+            await getattr(self, scenario)()
+            if self.args.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time))
+        await self.conn.close()
+
+
+class AbusiveUser(VirtualUser):
+    """
+    One account hammering the expensive aggregate endpoints over several
+    connections, with no think time and ignoring 429s.
+    """
+
+    def __init__(self, connection, args, metrics):
+        super().__init__(0, args, metrics)
+        self.email = f'{args.email_prefix}+abuser@example.com'
+        self.rng = random.Random(args.seed - 1 - connection)
+
+    async def aggregates(self):
+        today = date.today()
+        await self.call('GET', '/api/transactions/dashboard/')
+        await self.call('POST', f'/api/transactions/monthly/{today.year}/{today.month}/',
+                        label='/api/transactions/monthly/{year}/{month}/', body={})
+        await self.call('GET', '/api/transactions/cumulative-balance/')
+
+    async def run(self, weights, deadline):
+        while time.monotonic() < deadline:
+            await self.aggregates()
+        await self.conn.close()
+
+
+def parse_weights(spec):
+    if not spec:
+        return dict(DEFAULT_WEIGHTS)
+    weights = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_WEIGHTS:
+            raise argparse.ArgumentTypeError(f'Unknown scenario "{name}". Choose from: {", ".join(DEFAULT_WEIGHTS)}')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def run_load_test(args):
+    metrics = Metrics()
+    weights = parse_weights(args.scenarios)
+    users = [VirtualUser(i, args, metrics) for i in range(args.users)]
+
+    # Log everyone in before the clock starts so setup does not skew results.
+    semaphore = asyncio.Semaphore(args.setup_concurrency)
+
+    async def setup(user):
+        async with semaphore:
+            return await user.setup()
+
+    ready = await asyncio.gather(*(setup(user) for user in users), return_exceptions=True)
+    active = [user for user, ok in zip(users, ready) if ok is True]
+    if not active:
+        raise SystemExit('No synthetic users could log in. Is the server running at ' + args.base_url + '?')
+
+    # The abuser's requests are reported separately, so the main report shows
+    # what everyone else experienced while it ran.
+    abuser_metrics = Metrics()
+    abusers = [AbusiveUser(i, args, abuser_metrics) for i in range(args.abuser_connections)]
+    if abusers:
+        if not await abusers[0].setup():
+            raise SystemExit('The abusive user could not log in.')
+        for abuser in abusers[1:]:
+            abuser.token = abusers[0].token
+
+    start = time.monotonic()
+    await asyncio.gather(*(user.run(weights, start + args.duration) for user in active + abusers))
+    elapsed = time.monotonic() - start
+
+    report = {
+        'base_url': args.base_url,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() - elapsed)),
+        'duration_s': round(elapsed, 2),
+        'users': len(active),
+        'scenarios': weights,
+        'seed': args.seed,
+    }
+    report.update(metrics.report(elapsed))
+    if abusers:
+        report['abuser'] = {'connections': len(abusers), **abuser_metrics.report(elapsed)}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent load test for the Expenso API.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=20, help='Number of concurrent synthetic users.')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run the scenarios for.')
+    parser.add_argument('--scenarios', default=None,
+                        help='Weighted scenario mix, e.g. "dashboard=5,add_transaction=3,history=2,login_storm=1".')
+    parser.add_argument('--think-time', type=float, default=0,
+                        help='Mean pause between scenarios per user, in seconds (0 = closed loop).')
+    parser.add_argument('--login-burst', type=int, default=3, help='Logins per login_storm scenario.')
+    parser.add_argument('--abuser-connections', type=int, default=0,
+                        help='Add one abusive user hammering the aggregate endpoints over this many connections.')
+    parser.add_argument('--email-prefix', default='loadtest')
+    parser.add_argument('--password', default='loadtest-pass-123')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--setup-concurrency', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report to this file as well as stdout.')
+    args = parser.parse_args(argv)
+    try:
+        parse_weights(args.scenarios)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    report = asyncio.run(run_load_test(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+    print(output)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
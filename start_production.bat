@@ -7,6 +7,9 @@ pip install -r requirements.txt
 echo Collecting static files...
 python manage.py collectstatic --noinput
 
+echo Generating API schema...
+python manage.py generate_swagger --overwrite --format json openapi.json
+
 echo Running migrations...
 python manage.py migrate
 
@@ -7,8 +7,11 @@ pip install -r requirements.txt
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+echo "Generating API schema..."
+python manage.py generate_swagger --overwrite --format json openapi.json
+
 echo "Running migrations..."
 python manage.py migrate
 
-echo "Starting Gunicorn server..."
-gunicorn --bind 0.0.0.0:8000 --workers 3 expenso_backend.wsgi:application
\ No newline at end of file
+echo "Starting Gunicorn server and background job worker..."
+exec ./with_worker.sh gunicorn --bind 0.0.0.0:8000 --workers 3 expenso_backend.wsgi:application
\ No newline at end of file
@@ -0,0 +1,18 @@
+#!/bin/bash
+echo "Starting Expenso in Production Mode (ASGI)..."
+
+echo "Installing dependencies..."
+pip install -r requirements.txt
+
+echo "Collecting static files..."
+python manage.py collectstatic --noinput
+
+echo "Generating API schema..."
+python manage.py generate_swagger --overwrite --format json openapi.json
+
+echo "Running migrations..."
+python manage.py migrate
+
+echo "Starting Gunicorn with Uvicorn workers and background job worker..."
+export ASYNC_READ_VIEWS=True
+exec ./with_worker.sh gunicorn --bind 0.0.0.0:8000 --workers 3 -k uvicorn.workers.UvicornWorker expenso_backend.asgi:application
@@ -0,0 +1,154 @@
+"""
+Currency-aware transaction totals.
+
+Amounts are converted to the user's home currency inside the SQL aggregate,
+using the most recent ExchangeRate on or before each transaction's date, so
+totals stay a single grouped query however many currencies are mixed. Ranges
+reaching past the archive cutoff run the same query on the archive table too.
+"""
+from django.conf import settings
+from django.db import models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear, Round
+
+from .archive import areaches_archive, reaches_archive
+from .models import Transaction, TransactionArchive, ExchangeRate
+
+AMOUNT_FIELD = models.DecimalField(max_digits=12, decimal_places=2)
+RATE_FIELD = models.DecimalField(max_digits=18, decimal_places=8)
+
+
+def home_currency(user):
+    return user.currency or settings.EXCHANGE_RATE_BASE_CURRENCY
+
+
+def _rate_on_date(currency):
+    rates = ExchangeRate.objects.filter(currency=currency, date__lte=OuterRef('date')).order_by('-date')
+    return Subquery(rates.values('rate')[:1], output_field=RATE_FIELD)
+
+
+def home_amount(user):
+    """Expression for a transaction's amount in the user's home currency."""
+    home = home_currency(user)
+    base = settings.EXCHANGE_RATE_BASE_CURRENCY
+    # Rates are quoted in the base currency, which therefore has an implicit rate of 1
+    rate = Case(
+        When(currency=base, then=Value(1)),
+        default=_rate_on_date(OuterRef('currency')),
+        output_field=RATE_FIELD,
+    )
+    converted = F('amount') * rate
+    if home != base:
+        converted = converted / _rate_on_date(home)
+    return Case(
+        When(currency__in=['', home], then=F('amount')),
+        # Converted amounts are rounded to cents. Without a usable rate the
+        # amount is counted as-is rather than dropped.
+        default=Coalesce(Round(converted, 2), F('amount'), output_field=AMOUNT_FIELD),
+        output_field=AMOUNT_FIELD,
+    )
+
+
+def _sums(user):
+    amount = home_amount(user)
+    return {
+        'income': Sum(amount, filter=Q(transaction_type='income'), output_field=AMOUNT_FIELD),
+        'expenses': Sum(amount, filter=Q(transaction_type='expense'), output_field=AMOUNT_FIELD),
+    }
+
+
+def _querysets(user, filters):
+    querysets = [Transaction.objects.filter(user=user, **filters)]
+    if reaches_archive(filters):
+        querysets.append(TransactionArchive.objects.filter(user=user, **filters))
+    return querysets
+
+
+async def _aquerysets(user, filters):
+    querysets = [Transaction.objects.filter(user=user, **filters)]
+    if await areaches_archive(filters):
+        querysets.append(TransactionArchive.objects.filter(user=user, **filters))
+    return querysets
+
+
+def _add_totals(total, result):
+    return (
+        total[0] + result['count'],
+        total[1] + (result['income'] or 0),
+        total[2] + (result['expenses'] or 0),
+    )
+
+
+def totals(user, **filters):
+    """
+    Transaction count, income and expenses for the user's transactions matching
+    `filters`, in one query per table. Missing totals are returned as 0.
+    """
+    total = (0, 0, 0)
+    for queryset in _querysets(user, filters):
+        total = _add_totals(total, queryset.aggregate(count=Count('id'), **_sums(user)))
+    return total
+
+
+async def atotals(user, **filters):
+    total = (0, 0, 0)
+    for queryset in await _aquerysets(user, filters):
+        total = _add_totals(total, await queryset.aaggregate(count=Count('id'), **_sums(user)))
+    return total
+
+
+def _monthly_rows(queryset, user):
+    return (
+        queryset
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .order_by()
+        .values('year', 'month')
+        .annotate(**_sums(user))
+    )
+
+
+def _add_month(months, row):
+    income, expenses = months.get((row['year'], row['month']), (0, 0))
+    months[row['year'], row['month']] = (income + (row['income'] or 0), expenses + (row['expenses'] or 0))
+
+
+def monthly_totals(user, **filters):
+    """{(year, month): (income, expenses)} for the user's transactions, in one grouped query per table."""
+    months = {}
+    for queryset in _querysets(user, filters):
+        for row in _monthly_rows(queryset, user):
+            _add_month(months, row)
+    return months
+
+
+def daily_net(user):
+    """{date: income - expenses} over all of the user's transactions, in one grouped query per table."""
+    net = {}
+    for queryset in _querysets(user, {}):
+        for row in queryset.order_by().values('date').annotate(**_sums(user)):
+            net[row['date']] = net.get(row['date'], 0) + (row['income'] or 0) - (row['expenses'] or 0)
+    return net
+
+
+def purpose_totals(user, **filters):
+    """
+    {purpose: (count, income, expenses)} for the user's transactions, in one
+    grouped query per table, streamed rather than read into memory at once.
+    """
+    purposes = {}
+    for queryset in _querysets(user, filters):
+        rows = queryset.order_by().values('purpose').annotate(count=Count('id'), **_sums(user))
+        for row in rows.iterator(chunk_size=2000):
+            count, income, expenses = purposes.get(row['purpose'], (0, 0, 0))
+            purposes[row['purpose']] = (
+                count + row['count'], income + (row['income'] or 0), expenses + (row['expenses'] or 0),
+            )
+    return purposes
+
+
+async def amonthly_totals(user, **filters):
+    months = {}
+    for queryset in await _aquerysets(user, filters):
+        async for row in _monthly_rows(queryset, user):
+            _add_month(months, row)
+    return months
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TransactionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'transactions'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from expenso_backend.sqlite import apply_sqlite_pragmas
+
+        connection_created.connect(apply_sqlite_pragmas)
@@ -0,0 +1,97 @@
+"""
+Hot/cold transaction storage.
+
+Transactions dated before the archive cutoff are moved to TransactionArchive
+by the archive_transactions command, keeping the hot table and its (user, date)
+index small. Reads whose date filters start on or after the cutoff only touch
+the hot table; anything reaching further back also reads the archive.
+
+Each run raises the cutoff to the first day of the month
+TRANSACTION_ARCHIVE_AFTER_DAYS ago, and records it in ArchiveWatermark before
+moving anything. The recorded cutoff only ever moves forward, even if the
+setting is raised later, so a range that is hot-only when checked cannot have
+been archived yet.
+"""
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchiveWatermark, Transaction, TransactionArchive
+
+
+def archive_cutoff():
+    """Transactions dated before this day may be in the archive."""
+    cutoff = ArchiveWatermark.objects.values_list('cutoff', flat=True).first()
+    # Nothing has been archived yet
+    return cutoff or date.min
+
+
+async def aarchive_cutoff():
+    cutoff = await ArchiveWatermark.objects.values_list('cutoff', flat=True).afirst()
+    return cutoff or date.min
+
+
+def _advance_cutoff():
+    """Raise the recorded cutoff to the configured one, never lowering it. Returns the cutoff in effect."""
+    oldest = timezone.now().date() - timedelta(days=settings.TRANSACTION_ARCHIVE_AFTER_DAYS)
+    target = oldest.replace(day=1)
+    with transaction.atomic():
+        mark = ArchiveWatermark.objects.select_for_update().first()
+        if mark is None:
+            mark = ArchiveWatermark.objects.create(cutoff=target)
+        elif mark.cutoff < target:
+            mark.cutoff = target
+            mark.save(update_fields=['cutoff'])
+    return mark.cutoff
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _lower_bound(filters):
+    """Earliest date matched by queryset `filters`, or None if unbounded."""
+    if 'date' in filters:
+        return _as_date(filters['date'])
+    if 'date__range' in filters:
+        return _as_date(filters['date__range'][0])
+    for lookup in ('date__gte', 'date__gt'):
+        if lookup in filters:
+            return _as_date(filters[lookup])
+    if 'date__year' in filters:
+        return date(int(filters['date__year']), int(filters.get('date__month', 1)), 1)
+    return None
+
+
+def reaches_archive(filters):
+    lower = _lower_bound(filters)
+    return lower is None or lower < archive_cutoff()
+
+
+async def areaches_archive(filters):
+    lower = _lower_bound(filters)
+    return lower is None or lower < await aarchive_cutoff()
+
+
+def archive_transactions(batch_size=5000):
+    """Move transactions dated before the cutoff into the archive. Returns the number moved."""
+    # Committed before any row moves, so readers include the archive from here on
+    old = Transaction.objects.filter(date__lt=_advance_cutoff()).order_by('id')
+    fields = [field.attname for field in Transaction._meta.concrete_fields]
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(old[:batch_size])
+            if not batch:
+                return moved
+            TransactionArchive.objects.bulk_create([
+                TransactionArchive(**{name: getattr(row, name) for name in fields}) for row in batch
+            ])
+            Transaction.objects.filter(id__in=[row.id for row in batch]).delete()
+        moved += len(batch)
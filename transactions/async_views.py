@@ -0,0 +1,143 @@
+"""
+Native async versions of the read-heavy transaction endpoints.
+
+They return the same responses as their counterparts in views.py and are
+routed in place of them when settings.ASYNC_READ_VIEWS is enabled (the ASGI
+deployment profile). Django 4.2 runs async ORM calls and sync_to_async
+functions one at a time on a single shared thread, so the queries of a view
+run one after another, just as in the sync views: these views do no more
+work at once than their counterparts. The one difference is that the
+dashboard queues its balance repair for the job worker instead of writing
+during the GET.
+"""
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from expenso_backend.async_api import async_api_view, json_response, request_data
+from expenso_backend.db_router import replica_reads
+from expenso_backend.sparse_fields import only_fields, sparse_fields
+from expenso_backend.throttling import token_bucket
+from .aggregates import atotals, amonthly_totals
+from .balances import closing_balance, mark_stale, repair
+from .models import Transaction, Notification, MonthlyBalance, MonthlyGoal
+from .serializers import NotificationSerializer, transaction_values
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset]
+
+
+@async_api_view(['GET'], throttle_classes=[token_bucket('aggregates', cost=1)])
+async def dashboard_data(request):
+    user = request.user
+    today = timezone.now().date()
+
+    _, _, today_expenses = await atotals(user, date=today)
+    cumulative_balance = await sync_to_async(closing_balance)(user, defer_repair=True)
+    summary = await MonthlyBalance.objects.filter(user=user).aaggregate(
+        total_monthly_income=Sum('monthly_income'),
+        has_current_month=Count('id', filter=Q(year=today.year, month=today.month)),
+    )
+    total_monthly_income = summary['total_monthly_income'] or 0
+
+    if not summary['has_current_month']:
+        _, current_month_income, current_month_expenses = await atotals(
+            user, date__year=today.year, date__month=today.month
+        )
+        cumulative_balance += current_month_income - current_month_expenses
+
+    return json_response({
+        'current_balance': cumulative_balance,
+        'total_monthly_income': total_monthly_income,
+        'today_spending': today_expenses,
+        'card_number': user.card_number,
+        'card_holder_name': user.card_holder_name
+    })
+
+
+@async_api_view(['POST'], throttle_classes=[token_bucket('aggregates', cost=2)])
+async def monthly_statistics(request, year, month):
+    user = request.user
+    monthly_income = request_data(request).get('monthly_income', 0)
+
+    monthly_goal = await MonthlyGoal.objects.filter(user=user, year=year, month=month).afirst()
+
+    # If no goal for this month, fall back to the previous month's
+    if not monthly_goal:
+        prev_date = date(year - 1, 12, 1) if month == 1 else date(year, month - 1, 1)
+        monthly_goal = await MonthlyGoal.objects.filter(
+            user=user, year=prev_date.year, month=prev_date.month
+        ).afirst()
+
+    effective_income = monthly_income or (monthly_goal.monthly_income if monthly_goal else 0)
+
+    monthly_balance, created = await MonthlyBalance.objects.aget_or_create(
+        user=user,
+        year=year,
+        month=month,
+        defaults={'monthly_income': effective_income}
+    )
+
+    if monthly_income:
+        monthly_balance.monthly_income = monthly_income
+        await monthly_balance.asave()
+
+    if created or monthly_income:
+        await sync_to_async(mark_stale)(user, year, month)
+
+    month_filter = {'date__year': year, 'date__month': month}
+    await sync_to_async(repair)(user)
+    total_transactions, total_addon, total_expenses = await atotals(user, **month_filter)
+    transactions = await _list(transaction_values.values_list(await Transaction.objects.acovering(user, **month_filter)))
+    await monthly_balance.arefresh_from_db(fields=['starting_balance', 'current_balance'])
+    cumulative_balance = monthly_balance.current_balance
+
+    return json_response({
+        'monthly_income': float(monthly_balance.monthly_income),
+        'total_transactions': total_transactions,
+        'total_addon': float(total_addon),
+        'total_expenses': float(total_expenses),
+        'current_balance': float(cumulative_balance),
+        'transactions': transaction_values.format(transactions)
+    })
+
+
+@replica_reads
+@async_api_view(['GET'], throttle_classes=[token_bucket('aggregates', cost=3)])
+async def cumulative_balance_history(request):
+    user = request.user
+
+    month_totals = await amonthly_totals(user)
+    monthly_balances = await _list(MonthlyBalance.objects.filter(user=user).order_by('year', 'month'))
+
+    cumulative_balance = user.initial_balance
+    history = []
+
+    for mb in monthly_balances:
+        month_income, month_expenses = month_totals.get((mb.year, mb.month), (0, 0))
+        cumulative_balance += mb.monthly_income + month_income - month_expenses
+
+        history.append({
+            'year': mb.year,
+            'month': mb.month,
+            'monthly_income': float(mb.monthly_income),
+            'transaction_income': float(month_income),
+            'expenses': float(month_expenses),
+            'cumulative_balance': float(cumulative_balance)
+        })
+
+    return json_response({
+        'initial_balance': float(user.initial_balance),
+        'current_cumulative_balance': float(cumulative_balance),
+        'monthly_history': history
+    })
+
+
+@async_api_view(['GET'])
+async def notification_list(request):
+    fieldset = sparse_fields(request, NotificationSerializer)
+    notifications = await _list(only_fields(Notification.objects.filter(user=request.user), NotificationSerializer, fieldset))
+    return json_response(NotificationSerializer(notifications, many=True, fieldset=fieldset).data)
@@ -0,0 +1,239 @@
+"""
+Balance on any date.
+
+Each worker process keeps, per user, a Fenwick tree (binary indexed tree) of
+net transaction amounts per day, so the net of any date range is an
+O(log days) query. Trees are built lazily from one grouped query, kept in an
+LRU of BALANCE_INDEX_CACHE_SIZE users and patched in O(log days) when the
+process itself writes a transaction.
+
+Other processes' writes are detected through a version number per user in the
+shared cache, bumped on every write. A tree whose version is out of date is
+rebuilt on its next read.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.transaction import on_commit
+
+from .aggregates import daily_net, home_currency, home_amount
+from .balances import from_month, initial_balance, repair
+from .models import MonthlyBalance, Transaction
+
+GENERATION_KEY = 'balance-index-generation'
+# Room left after the last transaction (and today) for future-dated writes
+HEADROOM_DAYS = 366
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+class FenwickTree:
+    """Prefix sums over a fixed-size array, with O(log n) updates and queries."""
+
+    def __init__(self, values):
+        # O(n) construction: push each node's total to its parent once
+        self.tree = [0] + list(values)
+        for i in range(1, len(self.tree)):
+            parent = i + (i & -i)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self):
+        return len(self.tree) - 1
+
+    def add(self, index, delta):
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index):
+        """Sum of values[0..index], inclusive."""
+        total = 0
+        i = min(index + 1, len(self))
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class DailyNetIndex:
+    """A user's net transaction amount per day between `start` and `end`."""
+
+    def __init__(self, start, end, net, version):
+        self.start = start
+        self.end = end
+        self.version = version
+        self.tree = FenwickTree(net.get(start + timedelta(days=offset), 0) for offset in range((end - start).days + 1))
+
+    def net_between(self, first, last):
+        """Net of all transactions dated first..last, inclusive."""
+        lo = max((first - self.start).days, 0)
+        hi = min((last - self.start).days, len(self.tree) - 1)
+        if hi < lo:
+            return 0
+        return self.tree.prefix_sum(hi) - self.tree.prefix_sum(lo - 1)
+
+    def add(self, day, delta):
+        """Apply a change on `day`. Returns False if the day is outside the index."""
+        if not self.start <= day <= self.end:
+            return False
+        self.tree.add((day - self.start).days, delta)
+        return True
+
+
+def _cache():
+    return caches[settings.BALANCE_INDEX_CACHE]
+
+
+def _version_key(user_id):
+    return f'balance-index-version:{user_id}'
+
+
+def _current_version(user_id):
+    versions = _cache().get_many([GENERATION_KEY, _version_key(user_id)])
+    return versions.get(GENERATION_KEY, 0), versions.get(_version_key(user_id), 0)
+
+
+def _bump(key):
+    try:
+        return _cache().incr(key)
+    except ValueError:
+        _cache().set(key, 1, None)
+        return 1
+
+
+def _build(user, version):
+    net = daily_net(user)
+    today = date.today()
+    start = min(net, default=today)
+    end = max(max(net, default=today), today) + timedelta(days=HEADROOM_DAYS)
+    return DailyNetIndex(start, end, net, version)
+
+
+def get_index(user):
+    version = _current_version(user.pk)
+    with _lock:
+        index = _indexes.get(user.pk)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(user.pk)
+            return index
+
+    index = _build(user, version)
+    with _lock:
+        _indexes[user.pk] = index
+        _indexes.move_to_end(user.pk)
+        while len(_indexes) > settings.BALANCE_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def signed_home_amount(user, transaction):
+    """A transaction's effect on the balance, in the user's home currency."""
+    if transaction.currency in ('', home_currency(user)):
+        # Instances created from request data may still hold the raw value
+        amount = Transaction._meta.get_field('amount').to_python(transaction.amount)
+    else:
+        amount = (
+            # Archived transactions are looked up in the archive table
+            type(transaction).objects.filter(pk=transaction.pk)
+            .annotate(home=home_amount(user))
+            .values_list('home', flat=True)
+            .get()
+        )
+    return amount if transaction.transaction_type == 'income' else -amount
+
+
+def record_change(user, day, delta):
+    """Apply a transaction write to this process's index and tell the others."""
+    generation, _ = _current_version(user.pk)
+    user_version = _bump(_version_key(user.pk))
+    with _lock:
+        index = _indexes.get(user.pk)
+        # Patch in place only if no other write happened since the tree was read
+        if index is not None and index.version == (generation, user_version - 1) and index.add(day, delta):
+            index.version = (generation, user_version)
+        else:
+            _indexes.pop(user.pk, None)
+
+
+def record_transaction(user, transaction, removed=False):
+    """Record a created (or, before deleting it, a removed) transaction once the write commits."""
+    delta = signed_home_amount(user, transaction)
+    # A rolled-back (or retried, see serialized_write) write must not patch the index
+    on_commit(lambda: record_change(user, transaction.date, -delta if removed else delta))
+
+
+def invalidate(user=None):
+    """Force a rebuild of one user's index, or of every user's (e.g. after new exchange rates)."""
+    _bump(GENERATION_KEY if user is None else _version_key(user.pk))
+
+
+def invalidate_many(user_ids):
+    """invalidate() for a batch of users."""
+    # No process holds more indexes than this, so past it rebuilding them all is cheaper
+    if len(user_ids) > settings.BALANCE_INDEX_CACHE_SIZE:
+        invalidate()
+    else:
+        for user_id in user_ids:
+            _bump(_version_key(user_id))
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _month_openings(user, first, last):
+    """
+    {(year, month): (opening balance, monthly income)} for each month from
+    first to last, read from the MonthlyBalance checkpoints.
+    """
+    repair(user)
+    balances = MonthlyBalance.objects.filter(user=user)
+    previous = (
+        balances.exclude(from_month(first.year, first.month))
+        .order_by('-year', '-month')
+        .values_list('current_balance', flat=True)
+        .first()
+    )
+    closing = initial_balance(user) if previous is None else previous
+    after = _next_month(last)
+    in_range = {
+        (mb.year, mb.month): mb
+        for mb in balances.filter(from_month(first.year, first.month)).exclude(from_month(after.year, after.month))
+    }
+
+    openings = {}
+    month = first.replace(day=1)
+    while month <= last:
+        mb = in_range.get((month.year, month.month))
+        if mb is None:
+            # Months without a MonthlyBalance carry the previous closing balance
+            openings[month.year, month.month] = (closing, 0)
+        else:
+            openings[month.year, month.month] = (mb.starting_balance, mb.monthly_income)
+            closing = mb.current_balance
+        month = _next_month(month)
+    return openings
+
+
+def balance_series(user, first, last):
+    """[(day, balance at the end of day)] for every day from first to last."""
+    index = get_index(user)
+    openings = _month_openings(user, first, last)
+    series = []
+    day = first
+    with _lock:
+        while day <= last:
+            opening, monthly_income = openings[day.year, day.month]
+            series.append((day, opening + monthly_income + index.net_between(day.replace(day=1), day)))
+            day += timedelta(days=1)
+    return series
+
+
+def balance_on(user, day):
+    return balance_series(user, day, day)[0][1]
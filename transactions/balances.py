@@ -0,0 +1,125 @@
+"""
+Running-balance checkpoints.
+
+Each MonthlyBalance row stores its month's opening balance in starting_balance
+(the previous row's closing balance, or the user's initial_balance for the
+first row) and its closing balance in current_balance (opening balance +
+monthly income + transaction income - expenses).
+
+Anything that changes a month marks that row and every later row stale. The
+chain is repaired lazily, from the first stale row onward, the next time a
+balance is read, so reading the current balance does not walk every month.
+When a change reaches back over several months, their repair is also queued
+for a background worker, so that read usually finds the chain already whole.
+Reads that must not write (the async dashboard) compute the stale months in
+memory and queue the repair instead.
+"""
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from jobs.queue import task
+
+from .aggregates import monthly_totals
+from .models import MonthlyBalance
+
+
+def from_month(year, month):
+    """Q for MonthlyBalance rows in (year, month) or later."""
+    return Q(year__gt=year) | Q(year=year, month__gte=month)
+
+
+def mark_stale(user, year=None, month=None):
+    """Invalidate the user's checkpoints from (year, month) on, or all of them."""
+    balances = MonthlyBalance.objects.filter(user=user)
+    if year is not None:
+        balances = balances.filter(from_month(year, month))
+    if balances.update(is_stale=True) > 1:
+        # Queued after the write commits; one waiting repair covers any number of writes
+        repair_user.enqueue(user_id=user.pk, unique=True)
+
+
+def mark_stale_many(user_ids, year, month):
+    """mark_stale() for many users at once, from the same month."""
+    MonthlyBalance.objects.filter(from_month(year, month), user_id__in=user_ids).update(is_stale=True)
+
+
+def initial_balance(user):
+    """
+    The user's initial_balance as stored. request.user may be a cached copy
+    (see authentication/authentication.py) from before a profile update.
+    """
+    return get_user_model().objects.filter(pk=user.pk).values_list('initial_balance', flat=True).first()
+
+
+def _first_stale(balances):
+    return balances.filter(is_stale=True).order_by('year', 'month').values_list('year', 'month').first()
+
+
+def _recompute(user, balances, first):
+    """The user's rows from month `first` on, with their balances recomputed but not saved."""
+    previous = (
+        balances.exclude(from_month(*first))
+        .order_by('-year', '-month')
+        .values_list('current_balance', flat=True)
+        .first()
+    )
+    balance = initial_balance(user) if previous is None else previous
+    month_totals = monthly_totals(user, date__gte=date(first[0], first[1], 1))
+
+    rows = list(balances.filter(from_month(*first)).order_by('year', 'month'))
+    for mb in rows:
+        income, expenses = month_totals.get((mb.year, mb.month), (0, 0))
+        mb.starting_balance = balance
+        balance = balance + mb.monthly_income + income - expenses
+        mb.current_balance = balance
+    return rows
+
+
+def repair(user):
+    """Recompute the user's stale checkpoints. Returns the number of rows rewritten."""
+    balances = MonthlyBalance.objects.filter(user=user)
+    first = _first_stale(balances)
+    if first is None:
+        return 0
+
+    with transaction.atomic():
+        # Claim the rows before reading totals: an invalidation that lands
+        # after this point marks them stale again instead of being lost.
+        balances.filter(from_month(*first)).update(is_stale=False)
+        rows = _recompute(user, balances, first)
+        MonthlyBalance.objects.bulk_update(rows, ['starting_balance', 'current_balance'])
+    return len(rows)
+
+
+@task
+def repair_user(user_id):
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is not None:
+        repair(user)
+
+
+def closing_balance(user, defer_repair=False):
+    """
+    The closing balance of the user's latest month, or initial_balance if there
+    are none. With `defer_repair`, stale months are recomputed in memory and
+    their repair is queued, so that the read does not write.
+    """
+    if not defer_repair:
+        repair(user)
+    else:
+        balances = MonthlyBalance.objects.filter(user=user)
+        first = _first_stale(balances)
+        if first is not None:
+            repair_user.enqueue(user_id=user.pk, unique=True)
+            # The latest month is always among the stale ones
+            return _recompute(user, balances, first)[-1].current_balance
+    latest = (
+        MonthlyBalance.objects.filter(user=user)
+        .order_by('-year', '-month')
+        .values_list('current_balance', flat=True)
+        .first()
+    )
+    return initial_balance(user) if latest is None else latest
@@ -0,0 +1,81 @@
+"""
+Transaction filters and ordering read from query parameters.
+
+    start, end              dates (YYYY-MM-DD), inclusive
+    type                    income or expense
+    min_amount, max_amount  amounts, inclusive
+    purpose                 the exact purpose
+    purpose_contains        text in the purpose, ignoring case
+    ordering                date, amount or created_at; prefixed with - for descending
+
+parse() checks them, raising ValueError with a message for the client, and
+lookups() turns them into queryset filters. Date filters are kept as
+date__gte / date__lte so Transaction.objects.covering() can tell whether the
+archive is reached.
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from .models import Transaction
+
+# The default ordering comes first. Ties are broken by id, so pages don't overlap.
+ORDERINGS = {
+    '-date': ('-date', '-id'),
+    'date': ('date', 'id'),
+    '-amount': ('-amount', '-id'),
+    'amount': ('amount', 'id'),
+    '-created_at': ('-created_at', '-id'),
+    'created_at': ('created_at', 'id'),
+}
+
+
+def parse(params):
+    """The filters given in `params`, as {name: value} with search.search()'s names."""
+    filters = {}
+    try:
+        for name in ('start', 'end'):
+            if params.get(name):
+                filters[name] = date.fromisoformat(params[name])
+    except ValueError:
+        raise ValueError('start and end must be dates, as YYYY-MM-DD')
+    try:
+        for name in ('min_amount', 'max_amount'):
+            if params.get(name):
+                filters[name] = Decimal(params[name])
+                if not filters[name].is_finite():
+                    raise InvalidOperation
+    except InvalidOperation:
+        raise ValueError('min_amount and max_amount must be numbers')
+    transaction_type = params.get('type')
+    if transaction_type:
+        if transaction_type not in dict(Transaction.TRANSACTION_TYPES):
+            raise ValueError('type must be income or expense')
+        filters['transaction_type'] = transaction_type
+    for name in ('purpose', 'purpose_contains'):
+        if params.get(name):
+            filters[name] = params[name]
+    return filters
+
+
+LOOKUPS = {
+    'start': 'date__gte',
+    'end': 'date__lte',
+    'transaction_type': 'transaction_type',
+    'min_amount': 'amount__gte',
+    'max_amount': 'amount__lte',
+    'purpose': 'purpose',
+    'purpose_contains': 'purpose__icontains',
+}
+
+
+def lookups(filters):
+    """Queryset filters for parsed `filters`."""
+    return {LOOKUPS[name]: value for name, value in filters.items()}
+
+
+def ordering(params):
+    """order_by() arguments for the `ordering` parameter."""
+    name = params.get('ordering') or next(iter(ORDERINGS))
+    if name not in ORDERINGS:
+        raise ValueError(f'ordering must be one of {", ".join(ORDERINGS)}')
+    return ORDERINGS[name]
@@ -0,0 +1,87 @@
+"""
+Idempotency keys for write endpoints.
+
+A client that sends `Idempotency-Key: <unique string>` with a request decorated
+with @idempotent can safely retry it with the same key: the first response is
+stored for settings.IDEMPOTENCY_KEY_TTL and replayed (with an
+`Idempotent-Replayed: true` header) instead of running the view again.
+
+The key is claimed by inserting its row in the same transaction as the view's
+writes. A concurrent duplicate blocks on the (user, key) unique constraint
+until the first commits, then replays its response; if the first fails and
+rolls back, the duplicate runs instead. Requests without the header are
+unaffected.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+
+def _fingerprint(request):
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _replay(record):
+    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view):
+    """Store and replay responses to requests sent with an Idempotency-Key header."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not 0 < len(key) <= 255:
+            return Response({'error': f'{HEADER} must be 1 to 255 characters long'}, status=400)
+
+        user = request.user
+        fingerprint = _fingerprint(request)
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=user, key=key, fingerprint=fingerprint,
+                        expires_at=timezone.now() + settings.IDEMPOTENCY_KEY_TTL,
+                    )
+            except IntegrityError:
+                record = IdempotencyKey.objects.get(user=user, key=key)
+                if record.expires_at > timezone.now():
+                    if record.fingerprint != fingerprint:
+                        return Response(
+                            {'error': f'{HEADER} was already used with a different request'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        )
+                    return _replay(record)
+                # Expired but not pruned yet: start afresh
+                record.fingerprint = fingerprint
+                record.status_code = record.response = None
+                record.expires_at = timezone.now() + settings.IDEMPOTENCY_KEY_TTL
+                record.save()
+
+            response = view(request, *args, **kwargs)
+            if response.status_code >= 500 or not hasattr(response, 'data'):
+                # Not worth replaying; let a retry run the view again
+                record.delete()
+            else:
+                record.status_code, record.response = response.status_code, response.data
+                record.save(update_fields=['status_code', 'response'])
+        return response
+    return wrapper
+
+
+def prune_expired_keys():
+    """Delete idempotency keys past their TTL. Returns the number removed."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
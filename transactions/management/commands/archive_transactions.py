@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from transactions.archive import archive_cutoff, archive_transactions
+
+class Command(BaseCommand):
+    help = 'Move transactions dated before the archive cutoff into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        moved = archive_transactions(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {moved} transaction(s) dated before {archive_cutoff()}.')
+        )
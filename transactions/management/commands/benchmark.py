@@ -0,0 +1,232 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.authentication import CachedJWTAuthentication
+from authentication.serializers import UserProfileSerializer
+from transactions import views
+from transactions.models import Transaction, MonthlyBalance
+from transactions.serializers import TransactionSerializer, transaction_values
+
+User = get_user_model()
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+# Days of history per dataset; every day gets TRANSACTIONS_PER_DAY rows.
+DATASETS = {
+    '1m': 31,
+    '1y': 365,
+    '10y': 3650,
+}
+TRANSACTIONS_PER_DAY = 3
+SERIALIZER_ROWS = 10000
+PURPOSES = ['Groceries', 'Rent', 'Coffee', 'Fuel', 'Salary', 'Dining out', 'Utilities', 'Gym']
+
+
+def seed_user(email, days, seed=1):
+    """Create a user with `days` of transaction history ending today."""
+    rng = random.Random(seed)
+    user = User.objects.create_user(
+        email=email, username=email, password='benchmark-pass',
+        full_name='Benchmark User', country='US', initial_balance=Decimal('1000.00'),
+    )
+    today = timezone.now().date()
+    start = today - timedelta(days=days - 1)
+
+    rows = []
+    months = set()
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        months.add((day.year, day.month))
+        for _ in range(TRANSACTIONS_PER_DAY):
+            rows.append(Transaction(
+                user=user,
+                transaction_type='income' if rng.random() < 0.1 else 'expense',
+                amount=Decimal(rng.randint(100, 50000)) / 100,
+                purpose=rng.choice(PURPOSES),
+                date=day,
+            ))
+    Transaction.objects.bulk_create(rows, batch_size=2000)
+    MonthlyBalance.objects.bulk_create([
+        MonthlyBalance(user=user, year=year, month=month, monthly_income=Decimal('3000.00'))
+        for year, month in sorted(months)
+    ])
+    return user
+
+
+class Case:
+    """A benchmarked code path. `prepare` runs untimed and returns the callable to time."""
+
+    def __init__(self, name, prepare):
+        self.name = name
+        self.prepare = prepare
+
+
+def _api_call(view, method, path, **kwargs):
+    def prepare(user):
+        factory = APIRequestFactory()
+        today = timezone.now().date()
+
+        def run():
+            request = getattr(factory, method)(path.format(year=today.year, month=today.month), {}, format='json')
+            force_authenticate(request, user=user)
+            response = view(request, **{k: v(today) for k, v in kwargs.items()})
+            assert response.status_code == 200, response.status_code
+            return response.data
+        return run
+    return prepare
+
+
+def _transaction_serializer(user):
+    rows = list(Transaction.objects.filter(user=user)[:SERIALIZER_ROWS])
+    return lambda: TransactionSerializer(rows, many=True).data
+
+
+def _transaction_values(user):
+    rows = list(transaction_values.values_list(Transaction.objects.filter(user=user)[:SERIALIZER_ROWS]))
+    return lambda: transaction_values.format(rows)
+
+
+def _profile_serializer(user):
+    return lambda: UserProfileSerializer(user).data
+
+
+def _jwt_authentication(user):
+    factory = APIRequestFactory()
+    token = str(RefreshToken.for_user(user).access_token)
+    authenticator = CachedJWTAuthentication()
+
+    def run():
+        request = factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        authenticated, _ = authenticator.authenticate(request)
+        assert authenticated.pk == user.pk
+    return run
+
+
+CASES = [
+    Case('dashboard_data', _api_call(views.dashboard_data, 'get', '/api/transactions/dashboard/')),
+    Case('monthly_statistics', _api_call(
+        views.monthly_statistics, 'post', '/api/transactions/monthly/{year}/{month}/',
+        year=lambda today: today.year, month=lambda today: today.month,
+    )),
+    Case('cumulative_balance_history', _api_call(
+        views.cumulative_balance_history, 'get', '/api/transactions/cumulative-balance/')),
+    Case('transaction_serializer_many', _transaction_serializer),
+    Case('transaction_values_serializer', _transaction_values),
+    Case('user_profile_serializer', _profile_serializer),
+    Case('jwt_authentication', _jwt_authentication),
+]
+
+
+def measure(run, repeat):
+    run()  # warm-up: first call pays for lazy imports and cold caches
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    with CaptureQueriesContext(connection) as ctx:
+        run()
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'time_ms': round(statistics.median(timings) * 1000, 3),
+        'min_ms': round(min(timings) * 1000, 3),
+        'queries': len(ctx.captured_queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark hot view functions and serializers against seeded datasets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', action='append', choices=list(DATASETS),
+                            help='Dataset(s) to run. Defaults to all.')
+        parser.add_argument('--case', action='append', choices=[case.name for case in CASES],
+                            help='Case(s) to run. Defaults to all.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (median is reported).')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file to compare against.')
+        parser.add_argument('--save-baseline', action='store_true', help='Overwrite the baseline with this run.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative slowdown before a case counts as a regression.')
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--output', help='Also write the results as JSON to this file.')
+
+    # Benchmarked requests must not be refused, nor spend any real buckets
+    @override_settings(THROTTLE_ENABLED=False)
+    def handle(self, *args, **options):
+        datasets = options['dataset'] or list(DATASETS)
+        cases = [case for case in CASES if not options['case'] or case.name in options['case']]
+
+        # Run against a throwaway test database so real data is never touched.
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            results = {}
+            for dataset in datasets:
+                self.stdout.write(f'Seeding {dataset} dataset...')
+                user = seed_user(f'bench-{dataset}@example.com', DATASETS[dataset])
+                for case in cases:
+                    key = f'{case.name}[{dataset}]'
+                    results[key] = measure(case.prepare(user), options['repeat'])
+                    self.stdout.write(f'  {key}: {results[key]["time_ms"]} ms, '
+                                      f'{results[key]["queries"]} queries, {results[key]["peak_kb"]} KB')
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        baseline_path = Path(options['baseline'])
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        regressions = self.compare(results, baseline, options['tolerance'])
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} benchmark regression(s): {", ".join(regressions)}')
+
+    def compare(self, results, baseline, tolerance):
+        if not baseline:
+            self.stdout.write('No baseline to compare against.')
+            return []
+
+        self.stdout.write('\n{:<45} {:>12} {:>12} {:>9} {:>10}'.format('case', 'baseline ms', 'current ms', 'change', 'queries'))
+        regressions = []
+        for key, current in results.items():
+            previous = baseline.get(key)
+            if previous is None:
+                self.stdout.write(f'{key:<45} {"-":>12} {current["time_ms"]:>12} {"new":>9} {current["queries"]:>10}')
+                continue
+            change = (current['time_ms'] - previous['time_ms']) / previous['time_ms'] if previous['time_ms'] else 0
+            queries = f'{previous["queries"]}->{current["queries"]}' if previous['queries'] != current['queries'] else str(current['queries'])
+            line = f'{key:<45} {previous["time_ms"]:>12} {current["time_ms"]:>12} {change:>+9.1%} {queries:>10}'
+            if change > tolerance or current['queries'] > previous['queries']:
+                regressions.append(key)
+                line = self.style.ERROR(line)
+            elif change < -tolerance or current['queries'] < previous['queries']:
+                line = self.style.SUCCESS(line)
+            self.stdout.write(line)
+        return regressions
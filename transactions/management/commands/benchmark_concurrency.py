@@ -0,0 +1,173 @@
+import json
+import multiprocessing
+import queue
+import tempfile
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from transactions import views
+from transactions.management.commands.benchmark import seed_user
+
+User = get_user_model()
+
+# SQLite defaults, for comparison with the production profile
+ROLLBACK_JOURNAL = {
+    'SQLITE_PRAGMAS': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'SQLITE_WRITE_RETRIES': 0,
+}
+
+
+def _reader(user):
+    factory = APIRequestFactory()
+    history = views.TransactionHistoryView.as_view()
+
+    def run():
+        for view, path in ((views.dashboard_data, '/api/transactions/dashboard/'),
+                           (history, '/api/transactions/history/')):
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            response = view(request)
+            assert response.status_code == 200, response.status_code
+            response.render()
+    return run
+
+
+def _writer(user):
+    factory = APIRequestFactory()
+    create = views.TransactionListCreateView.as_view()
+    today = timezone.now().date().isoformat()
+
+    def run():
+        request = factory.post('/api/transactions/', {
+            'transaction_type': 'expense', 'amount': '4.50', 'purpose': 'Coffee', 'date': today,
+        }, format='json')
+        force_authenticate(request, user=user)
+        assert create(request).status_code == 201
+
+        request = factory.post('/api/transactions/mark-daily-expense-used/')
+        force_authenticate(request, user=user)
+        assert views.mark_daily_expense_used(request).status_code == 200
+    return run
+
+
+def _worker(role, user_id, start_at, seconds, results):
+    done = errors = 0
+    failure = None
+    try:
+        user = User.objects.get(pk=user_id)
+        run = _reader(user) if role == 'read' else _writer(user)
+        time.sleep(max(0, start_at - time.time()))
+        deadline = start_at + seconds
+        while time.time() < deadline:
+            try:
+                run()
+                done += 1
+            except OperationalError:
+                errors += 1
+    except BaseException as exc:
+        failure = repr(exc)
+    finally:
+        # The parent waits for one result per worker, however it ended
+        connections.close_all()
+        results.put((role, done, errors, failure))
+
+
+def run_phase(user_ids, readers, writers, seconds):
+    """Run reader and writer processes side by side; returns ops/s and errors per role."""
+    # Children must open their own connections
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    start_at = time.time() + 1
+    roles = ['read'] * readers + ['write'] * writers
+    processes = [
+        context.Process(target=_worker, args=(role, user_ids[role], start_at, seconds, results))
+        for role in roles
+    ]
+    for process in processes:
+        process.start()
+    totals = {'read': [0, 0], 'write': [0, 0]}
+    failures = []
+    try:
+        for _ in processes:
+            role, done, errors, failure = results.get(timeout=start_at - time.time() + seconds + 60)
+            totals[role][0] += done
+            totals[role][1] += errors
+            if failure:
+                failures.append(f'{role}: {failure}')
+    except queue.Empty:
+        for process in processes:
+            process.terminate()
+        raise CommandError('A worker process exited without reporting its results.')
+    finally:
+        for process in processes:
+            process.join()
+    if failures:
+        raise CommandError(f'Worker processes failed: {"; ".join(failures)}')
+    result = {}
+    for role, (done, errors) in totals.items():
+        result[f'{role}_per_s'] = round(done / seconds, 1)
+        result[f'{role}_errors'] = errors
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Measure read throughput on SQLite with and without concurrent write bursts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=3, help='Reader processes.')
+        parser.add_argument('--writers', type=int, default=3, help='Writer processes during the burst.')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each phase.')
+        parser.add_argument('--profile', choices=['production', 'default', 'both'], default='both',
+                            help='SQLite settings to run with: the production profile, SQLite defaults, or both.')
+        parser.add_argument('--output', help='Also write the results as JSON to this file.')
+
+    # Benchmarked requests must not be refused, nor spend any real buckets
+    @override_settings(THROTTLE_ENABLED=False)
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('This benchmark is for SQLite deployments.')
+
+        profiles = ['default', 'production'] if options['profile'] == 'both' else [options['profile']]
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            # Worker processes need a database file rather than an in-memory one
+            connections['default'].settings_dict['TEST']['NAME'] = str(Path(tmp) / 'concurrency.sqlite3')
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+            try:
+                self.stdout.write('Seeding 1y dataset...')
+                user_ids = {
+                    'read': seed_user('reader@example.com', 365).pk,
+                    'write': seed_user('writer@example.com', 31).pk,
+                }
+                for profile in profiles:
+                    with override_settings(**(ROLLBACK_JOURNAL if profile == 'default' else {})):
+                        # Switch the journal mode once, before any worker connects
+                        connections.close_all()
+                        connections['default'].ensure_connection()
+                        results[profile] = {
+                            'reads_only': run_phase(user_ids, options['readers'], 0, options['seconds']),
+                            'write_burst': run_phase(user_ids, options['readers'], options['writers'], options['seconds']),
+                        }
+                    self.report(profile, results[profile])
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+
+    def report(self, profile, result):
+        idle = result['reads_only']['read_per_s']
+        burst = result['write_burst']
+        retained = burst['read_per_s'] / idle if idle else 0
+        self.stdout.write(
+            f'  {profile:<10} reads/s {idle:>8} alone, {burst["read_per_s"]:>8} during writes ({retained:.0%}); '
+            f'writes/s {burst["write_per_s"]:>7}; locked errors: {burst["read_errors"]} read, {burst["write_errors"]} write'
+        )
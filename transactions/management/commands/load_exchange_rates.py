@@ -0,0 +1,47 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from transactions import balance_index
+from transactions.balances import from_month
+from transactions.models import ExchangeRate, MonthlyBalance
+
+class Command(BaseCommand):
+    help = 'Load dated exchange rates from a CSV file with date,currency,rate columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file. rate is the value of one unit of currency in the base currency.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rows = []
+        try:
+            with open(options['path'], newline='') as fh:
+                for line_number, row in enumerate(csv.DictReader(fh), start=2):
+                    try:
+                        rows.append(ExchangeRate(
+                            currency=row['currency'].strip().upper(),
+                            date=date.fromisoformat(row['date'].strip()),
+                            rate=Decimal(row['rate'].strip()),
+                        ))
+                    except (KeyError, ValueError, InvalidOperation, AttributeError):
+                        raise CommandError(f'Invalid row on line {line_number}: {row}')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        ExchangeRate.objects.bulk_create(
+            rows,
+            batch_size=options['batch_size'],
+            update_conflicts=True,
+            unique_fields=['currency', 'date'],
+            update_fields=['rate'],
+        )
+        if rows:
+            # Conversions from the earliest loaded date on may have changed
+            earliest = min(row.date for row in rows)
+            MonthlyBalance.objects.filter(from_month(earliest.year, earliest.month)).update(is_stale=True)
+            balance_index.invalidate()
+        self.stdout.write(
+            self.style.SUCCESS(f'Loaded {len(rows)} exchange rate(s).')
+        )
@@ -0,0 +1,23 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from transactions.recurring import materialize_due
+
+
+class Command(BaseCommand):
+    help = 'Create the transactions of every recurring rule occurrence due today (or on --date), for all users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, default=None,
+                            help='Materialize occurrences up to this day (YYYY-MM-DD) instead of today.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rules per transaction.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rules, occurrences, users = materialize_due(options['date'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Materialized {occurrences} occurrence(s) of {rules} rule(s) for {users} user(s) '
+            f'in {time.perf_counter() - started:.2f}s.'
+        ))
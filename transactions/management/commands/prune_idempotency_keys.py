@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from transactions.idempotency import prune_expired_keys
+
+class Command(BaseCommand):
+    help = 'Delete stored idempotency-key responses past their TTL'
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_keys()
+        self.stdout.write(
+            self.style.SUCCESS(f'Pruned {deleted} expired idempotency key(s).')
+        )
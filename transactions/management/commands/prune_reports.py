@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from transactions.reports import prune
+
+class Command(BaseCommand):
+    help = 'Delete finished report jobs past their retention period, with their files'
+
+    def handle(self, *args, **options):
+        deleted = prune()
+        self.stdout.write(
+            self.style.SUCCESS(f'Pruned {deleted} report job(s).')
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from transactions.search import install
+
+class Command(BaseCommand):
+    help = 'Recreate the transaction search index and its triggers, and refill it'
+
+    def handle(self, *args, **options):
+        with connection.schema_editor() as schema_editor:
+            install(schema_editor)
+        self.stdout.write(self.style.SUCCESS('Rebuilt the transaction search index.'))
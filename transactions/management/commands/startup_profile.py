@@ -0,0 +1,135 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'startup_baseline.json'
+MILESTONES = ['interpreter', 'setup', 'urlconf', 'first_request']
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|( *)(\S+)')
+# Packages faster than this are too noisy to compare between runs
+NOISE_FLOOR_MS = 10
+
+
+def import_times(stderr):
+    """Self import time in ms per top-level package, from -X importtime output."""
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            packages[match.group(3).split('.')[0]] += int(match.group(1)) / 1000
+    return packages
+
+
+def profile_once(path):
+    """Boot the project in a fresh interpreter; returns (milestones, import times per package)."""
+    spawned = time.time()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'expenso_backend.startup_probe', str(spawned), path],
+        cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+    )
+    if result.returncode:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise CommandError('Startup probe failed:\n' + '\n'.join(errors[-20:]))
+    return json.loads(result.stdout.splitlines()[-1]), import_times(result.stderr)
+
+
+class Command(BaseCommand):
+    help = 'Profile worker startup: import time per top-level package and time to first request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/transactions/dashboard/', help='Path of the first request.')
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to boot (median is reported).')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list, slowest first.')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file to compare against.')
+        parser.add_argument('--save-baseline', action='store_true', help='Overwrite the baseline with this run.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative slowdown before a measurement counts as a regression.')
+        parser.add_argument('--max-import-ms', type=float, help='Fail if total import time exceeds this.')
+        parser.add_argument('--max-first-request-ms', type=float, help='Fail if time to first request exceeds this.')
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--output', help='Also write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        runs = [profile_once(options['path']) for _ in range(options['repeat'])]
+        names = {name for _, packages in runs for name in packages}
+        packages = {
+            name: round(statistics.median(run_packages.get(name, 0) for _, run_packages in runs), 1)
+            for name in names
+        }
+        results = {
+            'milestones_ms': {name: statistics.median(milestones[name] for milestones, _ in runs) for name in MILESTONES},
+            'import_ms': round(sum(packages.values()), 1),
+            'packages_ms': dict(sorted(packages.items(), key=lambda item: -item[1])),
+        }
+        self.report(results, runs[0][0]['status'], options['top'])
+
+        baseline_path = Path(options['baseline'])
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        regressions = self.compare(results, baseline, options['tolerance'])
+        for name, value, limit in (('import_ms', results['import_ms'], options['max_import_ms']),
+                                   ('first_request_ms', results['milestones_ms']['first_request'],
+                                    options['max_first_request_ms'])):
+            if limit is not None and value > limit:
+                regressions.append(f'{name} {value} > {limit}')
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2) + '\n')
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} startup regression(s): {", ".join(regressions)}')
+
+    def report(self, results, status, top):
+        milestones = results['milestones_ms']
+        self.stdout.write(
+            f'interpreter {milestones["interpreter"]} ms, django.setup() {milestones["setup"]} ms, '
+            f'URLconf {milestones["urlconf"]} ms, first request {milestones["first_request"]} ms (HTTP {status})'
+        )
+        self.stdout.write(f'total import time {results["import_ms"]} ms\n')
+        self.stdout.write('{:<30} {:>10}'.format('package', 'import ms'))
+        for name, ms in list(results['packages_ms'].items())[:top]:
+            self.stdout.write(f'{name:<30} {ms:>10}')
+
+    def compare(self, results, baseline, tolerance):
+        if not baseline:
+            self.stdout.write('No baseline to compare against.')
+            return []
+
+        current = {'import_ms': results['import_ms'], 'first_request_ms': results['milestones_ms']['first_request']}
+        previous = {'import_ms': baseline['import_ms'], 'first_request_ms': baseline['milestones_ms']['first_request']}
+        for name, ms in results['packages_ms'].items():
+            if ms >= NOISE_FLOOR_MS or baseline['packages_ms'].get(name, 0) >= NOISE_FLOOR_MS:
+                current[f'import:{name}'] = ms
+                previous[f'import:{name}'] = baseline['packages_ms'].get(name, 0)
+
+        self.stdout.write('\n{:<35} {:>12} {:>12} {:>9}'.format('measurement', 'baseline ms', 'current ms', 'change'))
+        regressions = []
+        for key, ms in current.items():
+            before = previous[key]
+            if not before:
+                # A package that was not imported at all before
+                regressions.append(key)
+                self.stdout.write(self.style.ERROR(f'{key:<35} {"-":>12} {ms:>12} {"new":>9}'))
+                continue
+            change = (ms - before) / before
+            # Small packages need to slow down by more than the noise floor as well
+            slower = change > tolerance and (ms - before >= NOISE_FLOOR_MS or not key.startswith('import:'))
+            line = f'{key:<35} {before:>12} {ms:>12} {change:>+9.1%}'
+            if slower:
+                regressions.append(key)
+                line = self.style.ERROR(line)
+            elif change < -tolerance:
+                line = self.style.SUCCESS(line)
+            self.stdout.write(line)
+        return regressions
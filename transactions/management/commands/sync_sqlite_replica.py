@@ -0,0 +1,36 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the replica file, for testing replica routing locally'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0,
+                            help='Keep copying every N seconds to simulate replication lag')
+
+    def handle(self, *args, **options):
+        if 'replica' not in settings.DATABASES:
+            raise CommandError('DATABASE_REPLICA_URL is not set.')
+        for alias in ('default', 'replica'):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'The {alias} database is not SQLite.')
+
+        while True:
+            self.copy()
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def copy(self):
+        primary = connections['default']
+        primary.ensure_connection()
+        replica = sqlite3.connect(settings.DATABASES['replica']['NAME'])
+        try:
+            primary.connection.backup(replica)
+        finally:
+            replica.close()
+        self.stdout.write(self.style.SUCCESS(f'Replica synced at {time.strftime("%H:%M:%S")}.'))
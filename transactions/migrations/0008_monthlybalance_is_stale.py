@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_transactionarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlybalance',
+            name='is_stale',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from transactions.search import install
+    install(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    from transactions.search import uninstall
+    uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_recurringrule'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:57
+
+from django.db import migrations, models
+
+
+def move_reports_to_database(apps, schema_editor):
+    from django.core.files.storage import default_storage
+
+    ReportJob = apps.get_model('transactions', 'ReportJob')
+    for job in ReportJob.objects.exclude(file='').only('id', 'file').iterator(chunk_size=100):
+        try:
+            with default_storage.open(job.file.name, 'rb') as f:
+                content = f.read()
+        except OSError:
+            # A lost file fails its job, so submitting the report again rebuilds it
+            ReportJob.objects.filter(pk=job.pk).update(status='failed', error='Report file missing')
+            continue
+        ReportJob.objects.filter(pk=job.pk).update(content=content, filename=job.file.name.rsplit('/', 1)[-1])
+        default_storage.delete(job.file.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0012_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='content',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='filename',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.RunPython(move_reports_to_database, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='reportjob',
+            name='file',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:07
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def seed_cutoff(apps, schema_editor):
+    # Rows archived before the cutoff was recorded must stay behind it
+    TransactionArchive = apps.get_model('transactions', 'TransactionArchive')
+    ArchiveWatermark = apps.get_model('transactions', 'ArchiveWatermark')
+    latest = TransactionArchive.objects.order_by('-date').values_list('date', flat=True).first()
+    if latest is not None:
+        ArchiveWatermark.objects.create(cutoff=latest + timedelta(days=1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0013_reportjob_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cutoff', models.DateField()),
+            ],
+        ),
+        migrations.RunPython(seed_cutoff, migrations.RunPython.noop),
+    ]
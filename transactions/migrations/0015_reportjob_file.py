@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:20
+
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+
+def move_reports_to_storage(apps, schema_editor):
+    from django.core.files.storage import default_storage
+
+    ReportJob = apps.get_model('transactions', 'ReportJob')
+    for job in ReportJob.objects.filter(content__isnull=False).only('id', 'user_id', 'filename').iterator(chunk_size=100):
+        content = ReportJob.objects.filter(pk=job.pk).values_list('content', flat=True).get()
+        name = default_storage.save(f'reports/{job.user_id}-{job.filename}', ContentFile(bytes(content)))
+        ReportJob.objects.filter(pk=job.pk).update(file=name, content=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0014_archivewatermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='file',
+            field=models.FileField(blank=True, default='', upload_to='reports/'),
+        ),
+        migrations.RunPython(move_reports_to_storage, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='reportjob',
+            name='content',
+        ),
+        migrations.RemoveField(
+            model_name='reportjob',
+            name='filename',
+        ),
+    ]
@@ -1,9 +1,34 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth import get_user_model
 from datetime import date
 
 User = get_user_model()
 
+class TransactionManager(models.Manager):
+    def covering(self, user, **filters):
+        """
+        The user's transactions matching `filters`. Archived transactions are
+        included (through a UNION) only when the filters reach back past the
+        archive cutoff.
+        """
+        from .archive import reaches_archive
+
+        return self._covering(user, filters, reaches_archive(filters))
+
+    async def acovering(self, user, **filters):
+        from .archive import areaches_archive
+
+        return self._covering(user, filters, await areaches_archive(filters))
+
+    def _covering(self, user, filters, reaches_archive):
+        hot = self.filter(user=user, **filters)
+        if not reaches_archive:
+            return hot
+        archived = TransactionArchive.objects.filter(user=user, **filters)
+        # Compound statements cannot carry the default ordering of each part
+        return hot.order_by().union(archived.order_by(), all=True).order_by('-date')
+
 class Transaction(models.Model):
     TRANSACTION_TYPES = [
         ('income', 'Income'),
@@ -13,12 +38,86 @@ class Transaction(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Blank means the user's home currency
+    currency = models.CharField(max_length=3, blank=True, default='')
     purpose = models.CharField(max_length=200, blank=True, default='')
     date = models.DateField(default=date.today)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set on occurrences materialized from a recurring rule (see recurring.py)
+    recurring_rule = models.ForeignKey('RecurringRule', null=True, blank=True, on_delete=models.SET_NULL, related_name='transactions')
+
+    objects = TransactionManager()
 
     class Meta:
         ordering = ['-date']
+        indexes = [models.Index(fields=['user', 'date'], name='transaction_user_date_idx')]
+        constraints = [models.UniqueConstraint(fields=['recurring_rule', 'date'], name='transaction_rule_date_unique')]
+
+class TransactionArchive(models.Model):
+    """
+    Transactions older than the archive cutoff, moved out of the hot table by
+    the archive_transactions command. Columns mirror Transaction, in the same
+    order, so the two tables can be UNIONed.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_transactions')
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, blank=True, default='')
+    purpose = models.CharField(max_length=200, blank=True, default='')
+    date = models.DateField()
+    created_at = models.DateTimeField()
+    recurring_rule = models.ForeignKey('RecurringRule', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+
+    class Meta:
+        ordering = ['-date']
+        indexes = [models.Index(fields=['user', 'date'], name='archive_user_date_idx')]
+
+class ArchiveWatermark(models.Model):
+    """
+    The archive cutoff in effect (a single row, see archive.py): transactions
+    dated before it may be in TransactionArchive, those on or after it never are.
+    """
+    cutoff = models.DateField()
+
+class RecurringRule(models.Model):
+    """A transaction repeated on a schedule, materialized by the materialize_recurring command."""
+    FREQUENCIES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_rules')
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, blank=True, default='')
+    purpose = models.CharField(max_length=200, blank=True, default='')
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES)
+    # Every `interval` days, weeks or months
+    interval = models.PositiveSmallIntegerField(default=1)
+    # Weekly rules: days of the week (0 is Monday); start_date's if empty
+    weekdays = models.JSONField(default=list, blank=True)
+    # Monthly rules: day of the month, the last day in shorter months; start_date's if unset
+    month_day = models.PositiveSmallIntegerField(null=True, blank=True)
+    start_date = models.DateField(default=date.today)
+    end_date = models.DateField(null=True, blank=True)
+    # The first occurrence not materialized yet; null once the rule has ended
+    next_date = models.DateField(null=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+class ExchangeRate(models.Model):
+    """Value of one unit of `currency` in settings.EXCHANGE_RATE_BASE_CURRENCY on `date`."""
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        unique_together = ['currency', 'date']
+        ordering = ['currency', '-date']
 
 class MonthlyBalance(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_balances')
@@ -27,6 +126,8 @@ class MonthlyBalance(models.Model):
     monthly_income = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     starting_balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     current_balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Set when starting_balance/current_balance need recomputing (see balances.py)
+    is_stale = models.BooleanField(default=True)
     daily_expense_used_dates = models.JSONField(default=list)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -37,16 +138,9 @@ class MonthlyBalance(models.Model):
     
     def calculate_balance(self):
         """Calculate current balance for this month"""
-        transactions = Transaction.objects.filter(
-            user=self.user,
-            date__year=self.year,
-            date__month=self.month
-        )
+        from .aggregates import totals
         
-        income = transactions.filter(transaction_type='income').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        expenses = transactions.filter(transaction_type='expense').aggregate(
-            total=models.Sum('amount'))['total'] or 0
+        _, income, expenses = totals(self.user, date__year=self.year, date__month=self.month)
         
         self.current_balance = self.starting_balance + self.monthly_income + income - expenses
         return self.current_balance
@@ -72,4 +166,55 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+
+class ReportJob(models.Model):
+    """A report computed in the background and stored as a file (see reports.py)."""
+    KINDS = [
+        ('yearly_summary', 'Yearly summary'),
+        ('statement', 'Statement'),
+        ('purpose_breakdown', 'Purpose breakdown'),
+    ]
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    params = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Digest of the kind, params and the user's data version, for deduplication
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    # Percent done
+    progress = models.PositiveSmallIntegerField(default=0)
+    # In the default storage, which web processes and workers must share
+    file = models.FileField(upload_to='reports/', blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Failed jobs are kept for their error, and don't block a retry
+            models.UniqueConstraint(
+                fields=['user', 'fingerprint'], condition=~models.Q(status='failed'), name='report_job_fingerprint_unique',
+            ),
+        ]
+
+class IdempotencyKey(models.Model):
+    """The response to a request sent with an Idempotency-Key header, replayed to its retries (see idempotency.py)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    # Digest of the method, path and body the key was first used with
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique')]
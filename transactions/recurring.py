@@ -0,0 +1,136 @@
+"""
+Recurring transactions.
+
+A RecurringRule repeats a transaction every `interval` days, weeks (on its
+`weekdays`) or months (on its `month_day`) from start_date until end_date.
+Each rule keeps the date of its next occurrence, indexed, so the scheduler
+only reads rules that are due and steps from one occurrence straight to the
+next: a run costs O(occurrences), however many rules or days there are.
+
+materialize_due() creates the occurrences in chunks with bulk_create. Every
+occurrence is unique per (rule, date), so a chunk that is replayed (after a
+crash, a rule edit, or two overlapping runs) skips the ones that exist.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from . import balance_index, suggestions
+from .balances import mark_stale_many
+from .models import RecurringRule, Transaction
+
+
+def _weekdays(rule):
+    return sorted(set(rule.weekdays)) or [rule.start_date.weekday()]
+
+
+def _month_occurrence(rule, year, month):
+    day = rule.month_day or rule.start_date.day
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _add_months(day, months):
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    return year, month + 1
+
+
+def _within(rule, day):
+    return day if rule.end_date is None or day <= rule.end_date else None
+
+
+def first_occurrence(rule):
+    """The rule's first occurrence on or after start_date, or None if there is none."""
+    start = rule.start_date
+    if rule.frequency == 'weekly':
+        week = start - timedelta(days=start.weekday())
+        later = [weekday for weekday in _weekdays(rule) if weekday >= start.weekday()]
+        first = week + timedelta(days=later[0]) if later else following(rule, week + timedelta(days=6))
+    elif rule.frequency == 'monthly':
+        first = _month_occurrence(rule, start.year, start.month)
+        if first < start:
+            first = _month_occurrence(rule, *_add_months(start, rule.interval))
+    else:
+        first = start
+    return _within(rule, first)
+
+
+def following(rule, day):
+    """The occurrence after `day`, which must be an occurrence (or, weekly, a day in an occurring week)."""
+    if rule.frequency == 'weekly':
+        week = day - timedelta(days=day.weekday())
+        weekdays = _weekdays(rule)
+        later = [weekday for weekday in weekdays if weekday > day.weekday()]
+        if later:
+            return week + timedelta(days=later[0])
+        return week + timedelta(weeks=rule.interval, days=weekdays[0])
+    if rule.frequency == 'monthly':
+        return _month_occurrence(rule, *_add_months(day, rule.interval))
+    return day + timedelta(days=rule.interval)
+
+
+def next_occurrence(rule, on_or_after):
+    """The rule's first occurrence on or after `on_or_after`, or None."""
+    day = first_occurrence(rule)
+    while day is not None and day < on_or_after:
+        day = _within(rule, following(rule, day))
+    return day
+
+
+def due_dates(rule, until):
+    """The rule's occurrences from next_date up to `until`, moving next_date past them."""
+    dates = []
+    day = rule.next_date
+    while day is not None and day <= until:
+        dates.append(day)
+        day = _within(rule, following(rule, day))
+    rule.next_date = day
+    return dates
+
+
+def _occurrence(rule, day):
+    return Transaction(
+        user_id=rule.user_id,
+        transaction_type=rule.transaction_type,
+        amount=rule.amount,
+        currency=rule.currency,
+        purpose=rule.purpose,
+        date=day,
+        recurring_rule_id=rule.id,
+    )
+
+
+def materialize_due(until=None, batch_size=2000):
+    """
+    Create every occurrence due on or before `until` (today by default), for
+    all users. Returns (rules, occurrences, users) processed.
+    """
+    until = until or date.today()
+    due = RecurringRule.objects.filter(next_date__lte=until).order_by('next_date')
+    rule_count = occurrence_count = 0
+    users = set()
+    while True:
+        # Processed rules move past `until`, so each chunk is the next one
+        with transaction.atomic():
+            rules = list(due[:batch_size])
+            if not rules:
+                break
+            occurrences = []
+            next_dates = defaultdict(list)
+            for rule in rules:
+                occurrences.extend(_occurrence(rule, day) for day in due_dates(rule, until))
+                next_dates[rule.next_date].append(rule.id)
+            Transaction.objects.bulk_create(occurrences, batch_size=batch_size, ignore_conflicts=True)
+            # Chunks share few distinct next dates: one UPDATE each instead of a CASE per rule
+            for next_date, ids in next_dates.items():
+                RecurringRule.objects.filter(id__in=ids).update(next_date=next_date)
+            chunk_users = {rule.user_id for rule in rules}
+            first = min(occurrence.date for occurrence in occurrences)
+            mark_stale_many(chunk_users, first.year, first.month)
+        rule_count += len(rules)
+        occurrence_count += len(occurrences)
+        users |= chunk_users
+    balance_index.invalidate_many(users)
+    suggestions.invalidate_many(users)
+    return rule_count, occurrence_count, len(users)
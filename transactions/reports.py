@@ -0,0 +1,219 @@
+"""
+Background reports.
+
+A report is submitted as a ReportJob, and computed by a run_worker process
+(see jobs/queue.py) once the submitting transaction commits. Workers read
+transactions with streaming queries, write the result to the default storage
+under reports/ and record their progress on the job, which clients poll.
+Invalid parameters fail a job at once; any other error is retried by the
+queue, and the job fails once the queue gives up on it.
+
+Identical submissions are deduplicated. A job's fingerprint hashes its kind,
+its parameters and the user's data version, so until something the report
+reads changes, submitting it again returns the existing job (and its file).
+A run that outlives settings.REPORT_JOB_TIMEOUT is handed to another worker
+by the queue. A job still running after that long without being taken over,
+or still pending with nothing queued to run it (its process died before
+queueing it), is failed, and submitting it again starts a new one.
+"""
+import csv
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from expenso_backend.sqlite import serialized_write
+from jobs.queue import task
+
+from .aggregates import home_currency, monthly_totals, purpose_totals
+from .models import ExchangeRate, MonthlyBalance, ReportJob, Transaction, TransactionArchive
+
+logger = logging.getLogger(__name__)
+
+# Statement rows between progress updates
+PROGRESS_EVERY = 5000
+
+
+def data_version(user):
+    """A value that changes whenever anything a report reads for the user does."""
+    # Transactions are added and deleted but never edited, so their count and
+    # highest id tell any change apart
+    version = [
+        Transaction.objects.filter(user=user).aggregate(count=Count('id'), last=Max('id')),
+        TransactionArchive.objects.filter(user=user).aggregate(count=Count('id'), last=Max('id')),
+        MonthlyBalance.objects.filter(user=user).aggregate(count=Count('id'), last=Max('updated_at')),
+        ExchangeRate.objects.aggregate(count=Count('id'), last=Max('id')),
+        # request.user may be a cached copy from before a profile update
+        get_user_model().objects.filter(pk=user.pk).values_list('updated_at', flat=True).first(),
+    ]
+    return json.dumps(version, cls=DjangoJSONEncoder, sort_keys=True)
+
+
+def fingerprint(user, kind, params):
+    payload = json.dumps([kind, params, data_version(user)], cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def submit(user, kind, params):
+    """The job computing this report, as (job, created): an existing one if the data hasn't changed."""
+    digest = fingerprint(user, kind, params)
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(user=user, kind=kind, params=params, fingerprint=digest)
+            # Queued once the job row has committed
+            run.enqueue(job_id=job.pk)
+    except IntegrityError:
+        job = ReportJob.objects.exclude(status='failed').get(user=user, fingerprint=digest)
+        expired = timezone.now() - settings.REPORT_JOB_TIMEOUT
+        if (
+            (job.status == 'running' and job.started_at < expired)
+            or (
+                job.status == 'pending' and job.created_at < expired
+                and not run.waiting({'job_id': job.pk}, statuses=['queued', 'running'])
+            )
+        ):
+            ReportJob.objects.filter(pk=job.pk, status=job.status).update(
+                status='failed', error='Timed out', finished_at=timezone.now(),
+            )
+            return submit(user, kind, params)
+        return job, False
+    return job, True
+
+
+
+def prune():
+    """Delete finished jobs older than settings.REPORT_RETENTION, and their files. Returns the number removed."""
+    expired = ReportJob.objects.filter(status__in=['done', 'failed'], finished_at__lt=timezone.now() - settings.REPORT_RETENTION)
+    for job in expired.exclude(file='').only('file').iterator():
+        job.file.delete(save=False)
+    deleted, _ = expired.delete()
+    return deleted
+
+@serialized_write
+def _update(job, **fields):
+    ReportJob.objects.filter(pk=job.pk).update(**fields)
+
+
+@serialized_write
+def _claim(job_id):
+    # A running job is one whose worker was lost, handed over by the queue
+    return ReportJob.objects.filter(pk=job_id, status__in=['pending', 'running']).update(
+        status='running', started_at=timezone.now(),
+    )
+
+
+def _failed(kwargs, error):
+    # The queue gave up on the job: no worker will finish it
+    ReportJob.objects.filter(pk=kwargs['job_id'], status__in=['pending', 'running']).update(
+        status='failed', error='Report could not be computed', finished_at=timezone.now(),
+    )
+
+
+@task(timeout=settings.REPORT_JOB_TIMEOUT, on_failure=_failed)
+def run(job_id):
+    """Compute a job's report, unless it has already finished."""
+    if not _claim(job_id):
+        return
+    job = ReportJob.objects.select_related('user').get(pk=job_id)
+    try:
+        BUILDERS[job.kind](job)
+    except (LookupError, TypeError, ValueError) as exc:
+        # Bad parameters fail the same way every time, so retrying is pointless
+        logger.warning('Report job %s failed: %s', job_id, exc)
+        _update(job, status='failed', error=str(exc), finished_at=timezone.now())
+
+
+def _finish(job, out, extension):
+    out.seek(0)
+    job.file.save(f'{job.user_id}-{job.pk}-{job.kind}.{extension}', File(out), save=False)
+    _update(job, status='done', progress=100, file=job.file.name, finished_at=timezone.now())
+
+
+def _cents(value):
+    # SQLite sums come back with binary float residue
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def _date_filters(params):
+    filters = {}
+    if params.get('start'):
+        filters['date__gte'] = date.fromisoformat(params['start'])
+    if params.get('end'):
+        filters['date__lte'] = date.fromisoformat(params['end'])
+    return filters
+
+
+def _yearly_summary(job):
+    user, year = job.user, job.params['year']
+    months = monthly_totals(user, date__year=year)
+    _update(job, progress=50)
+    incomes = dict(
+        MonthlyBalance.objects.filter(user=user, year=year).values_list('month', 'monthly_income')
+    )
+    rows = []
+    for month in range(1, 13):
+        income, expenses = (_cents(value) for value in months.get((year, month), (0, 0)))
+        monthly_income = incomes.get(month, _cents(0))
+        rows.append({
+            'month': month,
+            'monthly_income': monthly_income,
+            'income': income,
+            'expenses': expenses,
+            'net': monthly_income + income - expenses,
+        })
+    summary = {
+        'year': year,
+        'currency': home_currency(user),
+        'months': rows,
+        'totals': {
+            name: sum(row[name] for row in rows) for name in ('monthly_income', 'income', 'expenses', 'net')
+        },
+    }
+    with tempfile.TemporaryFile('w+') as out:
+        json.dump(summary, out, cls=DjangoJSONEncoder)
+        _finish(job, out, 'json')
+
+
+def _statement(job):
+    user = job.user
+    home = home_currency(user)
+    transactions = Transaction.objects.covering(user, **_date_filters(job.params)).order_by('date', 'id')
+    total = transactions.count()
+    # id is selected because the UNION with the archive can only order by selected columns
+    rows = transactions.values_list('id', 'date', 'transaction_type', 'amount', 'currency', 'purpose')
+    with tempfile.TemporaryFile('w+', newline='') as out:
+        writer = csv.writer(out)
+        writer.writerow(['date', 'type', 'amount', 'currency', 'purpose'])
+        for i, (_, day, kind, amount, currency, purpose) in enumerate(rows.iterator(chunk_size=2000), 1):
+            writer.writerow([day, kind, amount, currency or home, purpose])
+            if i % PROGRESS_EVERY == 0:
+                _update(job, progress=min(99, i * 100 // max(total, 1)))
+        _finish(job, out, 'csv')
+
+
+def _purpose_breakdown(job):
+    purposes = purpose_totals(job.user, **_date_filters(job.params))
+    _update(job, progress=50)
+    with tempfile.TemporaryFile('w+', newline='') as out:
+        writer = csv.writer(out)
+        writer.writerow(['purpose', 'count', 'income', 'expenses'])
+        for purpose, (count, income, expenses) in sorted(purposes.items(), key=lambda item: -item[1][2]):
+            writer.writerow([purpose, count, _cents(income), _cents(expenses)])
+        _finish(job, out, 'csv')
+
+
+BUILDERS = {
+    'yearly_summary': _yearly_summary,
+    'statement': _statement,
+    'purpose_breakdown': _purpose_breakdown,
+}
@@ -0,0 +1,170 @@
+"""
+Full-text search over transaction purposes.
+
+On SQLite each transaction table (hot and archive) has an FTS5 index, an
+external-content table over a view of its (owner, purpose) kept in sync by
+triggers. `owner` is a per-user token, so a query reads the intersection of
+the user's posting list with its terms' instead of every user's matches. On
+PostgreSQL a GIN index on to_tsvector('simple', purpose) does the same job.
+
+Every query word is matched as a prefix ("groc" finds "Groceries"). Results
+are ordered by relevance (bm25 / ts_rank), then newest first, and paginated
+with an opaque keyset cursor, so deep pages cost the same as the first.
+
+Schema changes that rebuild a transaction table on SQLite drop its triggers;
+run the rebuild_search_index command after such a migration.
+"""
+import base64
+import json
+import re
+from datetime import date
+
+from django.db import connection
+
+from .archive import reaches_archive
+from .models import Transaction, TransactionArchive
+
+MAX_TERMS = 10
+TABLES = [Transaction._meta.db_table, TransactionArchive._meta.db_table]
+
+INDEX = {
+    'sqlite': [
+        "CREATE VIEW IF NOT EXISTS {table}_search AS SELECT id, 'u' || user_id AS owner, purpose FROM {table}",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5("
+        "owner, purpose, content='{table}_search', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+        "INSERT INTO {table}_fts (rowid, owner, purpose) VALUES (new.id, 'u' || new.user_id, new.purpose); END",
+        "CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+        "INSERT INTO {table}_fts ({table}_fts, rowid, owner, purpose) "
+        "VALUES ('delete', old.id, 'u' || old.user_id, old.purpose); END",
+        "CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF user_id, purpose ON {table} BEGIN "
+        "INSERT INTO {table}_fts ({table}_fts, rowid, owner, purpose) "
+        "VALUES ('delete', old.id, 'u' || old.user_id, old.purpose); "
+        "INSERT INTO {table}_fts (rowid, owner, purpose) VALUES (new.id, 'u' || new.user_id, new.purpose); END",
+        "INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')",
+    ],
+    'postgresql': [
+        "CREATE INDEX IF NOT EXISTS {table}_purpose_search ON {table} USING gin (to_tsvector('simple', purpose))",
+    ],
+}
+
+DROP = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS {table}_fts_insert',
+        'DROP TRIGGER IF EXISTS {table}_fts_delete',
+        'DROP TRIGGER IF EXISTS {table}_fts_update',
+        'DROP TABLE IF EXISTS {table}_fts',
+        'DROP VIEW IF EXISTS {table}_search',
+    ],
+    'postgresql': [
+        'DROP INDEX IF EXISTS {table}_purpose_search',
+    ],
+}
+
+
+def _run(statements, schema_editor):
+    for table in TABLES:
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement.format(table=table))
+
+
+def install(schema_editor):
+    """Create (or repair) the search indexes and fill them from the transaction tables."""
+    _run(INDEX, schema_editor)
+
+
+def uninstall(schema_editor):
+    _run(DROP, schema_editor)
+
+
+def terms(text):
+    """The words of a search query, lowercased."""
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps(row).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(rank, date, id) from a cursor, or ValueError."""
+    try:
+        rank, day, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        day = date.fromisoformat(day)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(rank, (int, float)) or type(pk) is not int:
+        raise ValueError('Invalid cursor')
+    return rank, day, pk
+
+
+def _matches(table, words, user, filters, params):
+    """SELECT rank, date, id of `table` rows matching, appending its parameters to `params`."""
+    conditions = ''.join(f' AND t.{condition}' for condition, _ in filters)
+    if connection.vendor == 'sqlite':
+        query = f'owner : "u{user.pk}" AND purpose : (' + ' '.join(f'"{word}"*' for word in words) + ')'
+        params += [query, *(value for _, value in filters)]
+        return (
+            f'SELECT bm25({table}_fts, 0.0, 1.0) AS rank, t.date AS date, t.id AS id '
+            f'FROM {table}_fts JOIN {table} t ON t.id = {table}_fts.rowid '
+            f'WHERE {table}_fts MATCH %s{conditions}'
+        )
+    query = ' & '.join(f'{word}:*' for word in words)
+    params += [query, user.pk, query, *(value for _, value in filters)]
+    # Negated so that, as with bm25, lower ranks are better
+    return (
+        f"SELECT -ts_rank(to_tsvector('simple', t.purpose), to_tsquery('simple', %s)) AS rank, "
+        f"t.date AS date, t.id AS id FROM {table} t WHERE t.user_id = %s "
+        f"AND to_tsvector('simple', t.purpose) @@ to_tsquery('simple', %s){conditions}"
+    )
+
+
+def search(user, text, start=None, end=None, transaction_type=None, min_amount=None, max_amount=None,
+           after=None, limit=50):
+    """
+    One page of the user's transactions whose purpose matches `text`, as
+    (ids in order, cursor for the next page or None). `after` is the cursor
+    returned with the previous page.
+    """
+    words = terms(text)
+    if not words:
+        return [], None
+
+    ops = connection.ops
+    filters = []
+    if start is not None:
+        filters.append(('date >= %s', ops.adapt_datefield_value(start)))
+    if end is not None:
+        filters.append(('date <= %s', ops.adapt_datefield_value(end)))
+    if transaction_type is not None:
+        filters.append(('transaction_type = %s', transaction_type))
+    if min_amount is not None:
+        filters.append(('amount >= %s', min_amount))
+    if max_amount is not None:
+        filters.append(('amount <= %s', max_amount))
+
+    tables = TABLES if reaches_archive({'date__gte': start} if start else {}) else TABLES[:1]
+    params = []
+    union = ' UNION ALL '.join(_matches(table, words, user, filters, params) for table in tables)
+    keyset = ''
+    if after is not None:
+        rank, day, pk = after
+        day = ops.adapt_datefield_value(day)
+        keyset = 'WHERE rank > %s OR (rank = %s AND (date < %s OR (date = %s AND id < %s)))'
+        params += [rank, rank, day, day, pk]
+    params.append(limit + 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rank, date, id FROM ({union}) matches {keyset} ORDER BY rank, date DESC, id DESC LIMIT %s',
+            params,
+        )
+        rows = cursor.fetchall()
+
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        rank, day, pk = page[-1]
+        next_cursor = encode_cursor([rank, str(day), pk])
+    return [pk for _, _, pk in page], next_cursor
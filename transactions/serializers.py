@@ -1,22 +1,198 @@
-from rest_framework import serializers
-from .models import Transaction, Notification, MonthlyBalance
+import decimal
+from datetime import date, timezone as dt_timezone
+from functools import cached_property
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from expenso_backend.sparse_fields import SparseFieldsetsMixin
+from .models import Transaction, Notification, MonthlyBalance, ExchangeRate, RecurringRule, ReportJob
 
-class TransactionSerializer(serializers.ModelSerializer):
+def check_exchange_rates(request, currency, on_date):
+    """Refuse a `currency` that can't be converted to the user's home currency on `on_date`."""
+    if not currency or request is None:
+        return
+    home = request.user.currency or settings.EXCHANGE_RATE_BASE_CURRENCY
+    # Foreign amounts need rates on or before their date to be converted
+    needed = {currency, home} - {settings.EXCHANGE_RATE_BASE_CURRENCY} if currency != home else set()
+    for code in sorted(needed):
+        if not ExchangeRate.objects.filter(currency=code, date__lte=on_date).exists():
+            raise serializers.ValidationError({'currency': f'No exchange rate available for {code} on {on_date}.'})
+
+class TransactionSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     purpose = serializers.CharField(required=False, allow_blank=True)
+    currency = serializers.CharField(required=False, allow_blank=True, max_length=3)
     
     class Meta:
         model = Transaction
-        fields = ['id', 'transaction_type', 'amount', 'purpose', 'date', 'created_at']
+        fields = ['id', 'transaction_type', 'amount', 'currency', 'purpose', 'date', 'created_at']
         read_only_fields = ['id']
+    
+    def validate_currency(self, value):
+        return value.upper()
+    
+    def validate(self, data):
+        check_exchange_rates(self.context.get('request'), data.get('currency'), data.get('date') or date.today())
+        return data
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'title', 'message', 'is_read', 'created_at']
         read_only_fields = ['id', 'created_at']
 
-class MonthlyBalanceSerializer(serializers.ModelSerializer):
+class MonthlyBalanceSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = MonthlyBalance
         fields = ['year', 'month', 'monthly_income', 'starting_balance', 'current_balance', 'daily_expense_used_dates']
-        read_only_fields = ['daily_expense_used_dates']
\ No newline at end of file
+        read_only_fields = ['daily_expense_used_dates']
+
+class RecurringRuleSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    purpose = serializers.CharField(required=False, allow_blank=True)
+    currency = serializers.CharField(required=False, allow_blank=True, max_length=3)
+
+    class Meta:
+        model = RecurringRule
+        fields = [
+            'id', 'transaction_type', 'amount', 'currency', 'purpose', 'frequency', 'interval',
+            'weekdays', 'month_day', 'start_date', 'end_date', 'next_date', 'created_at',
+        ]
+        read_only_fields = ['id', 'next_date', 'created_at']
+
+    def validate_currency(self, value):
+        return value.upper()
+
+    def validate_interval(self, value):
+        if value < 1:
+            raise serializers.ValidationError('Must be at least 1.')
+        return value
+
+    def validate_weekdays(self, value):
+        if not isinstance(value, list) or not all(type(day) is int and 0 <= day <= 6 for day in value):
+            raise serializers.ValidationError('Must be a list of days of the week, 0 (Monday) to 6 (Sunday).')
+        return sorted(set(value))
+
+    def validate_month_day(self, value):
+        if value is not None and not 1 <= value <= 31:
+            raise serializers.ValidationError('Must be between 1 and 31.')
+        return value
+
+    def validate(self, data):
+        start = data.get('start_date', getattr(self.instance, 'start_date', None))
+        end = data.get('end_date', getattr(self.instance, 'end_date', None))
+        if start and end and end < start:
+            raise serializers.ValidationError({'end_date': 'Must not be before start_date.'})
+        # Occurrences are converted from their own dates, none earlier than start_date
+        currency = data.get('currency', getattr(self.instance, 'currency', ''))
+        check_exchange_rates(self.context.get('request'), currency, start or date.today())
+        return data
+
+class ReportJobSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    # Report parameters, stored in `params`
+    year = serializers.IntegerField(write_only=True, required=False, min_value=1900, max_value=9999)
+    start = serializers.DateField(write_only=True, required=False)
+    end = serializers.DateField(write_only=True, required=False)
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'kind', 'params', 'status', 'progress', 'error', 'created_at', 'started_at', 'finished_at',
+            'download', 'year', 'start', 'end',
+        ]
+        read_only_fields = ['id', 'params', 'status', 'progress', 'error', 'created_at', 'started_at', 'finished_at']
+
+    def get_download(self, job):
+        if job.status != 'done':
+            return None
+        request = self.context.get('request')
+        url = reverse('report-download', args=[job.pk])
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def validate(self, data):
+        if data['kind'] == 'yearly_summary':
+            if 'year' not in data:
+                raise serializers.ValidationError({'year': 'This field is required.'})
+            return {'kind': data['kind'], 'params': {'year': data['year']}}
+        start, end = data.get('start'), data.get('end')
+        if start and end and end < start:
+            raise serializers.ValidationError({'end': 'Must not be before start.'})
+        params = {name: data[name].isoformat() for name in ('start', 'end') if name in data}
+        return {'kind': data['kind'], 'params': params}
+
+def _formatter(field):
+    """
+    A function equivalent to field.to_representation() for non-null values
+    read from the database, or None if DRF would return them unchanged.
+    """
+    kind = type(field)
+    if kind in (serializers.CharField, serializers.IntegerField):
+        return None
+    if kind is serializers.ChoiceField and all(isinstance(key, str) for key in field.choices):
+        return None
+    if (kind is serializers.DecimalField and field.decimal_places is not None and not field.localize
+            and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)):
+        quantum = decimal.Decimal('.1') ** field.decimal_places
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        return lambda value: '{:f}'.format(value.quantize(quantum, rounding=field.rounding, context=context))
+    if kind is serializers.DateField and getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601:
+        return date.isoformat
+    if kind is serializers.DateTimeField and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+        utc = field_timezone is dt_timezone.utc or getattr(field_timezone, 'key', None) == 'UTC'
+
+        def format_datetime(value):
+            if utc and value.tzinfo is dt_timezone.utc:
+                # What the database backends return with USE_TZ; no conversion needed
+                return value.isoformat()[:-6] + 'Z'
+            if timezone.is_naive(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return format_datetime
+    return field.to_representation
+
+class ValuesListSerializer:
+    """
+    Read-only fast path for serializer_class(queryset, many=True).data.
+
+    Reads values_list() tuples instead of model instances and formats them a
+    column at a time with formatters picked once per call, skipping DRF's
+    per-field dispatch for every row. The output is the same, so it renders to
+    the same JSON.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def fields(self):
+        return [field for field in self.serializer_class().fields.values() if not field.write_only]
+
+    def selected(self, fieldset=None):
+        """The output fields, limited to `fieldset` (see expenso_backend.sparse_fields)."""
+        return [field for field in self.fields if fieldset is None or field.field_name in fieldset]
+
+    def values_list(self, queryset, fieldset=None):
+        return queryset.values_list(*(field.source.replace('.', '__') for field in self.selected(fieldset)))
+
+    def format(self, rows, fieldset=None):
+        fields = self.selected(fieldset)
+        names = [field.field_name for field in fields]
+        columns = list(zip(*rows)) or [()] * len(names)
+        for i, field in enumerate(fields):
+            formatter = _formatter(field)
+            if formatter is not None:
+                # Like Serializer.to_representation, None is never passed to a field
+                columns[i] = [None if value is None else formatter(value) for value in columns[i]]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def serialize(self, queryset, fieldset=None):
+        return self.format(self.values_list(queryset, fieldset), fieldset)
+
+transaction_values = ValuesListSerializer(TransactionSerializer)
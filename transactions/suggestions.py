@@ -0,0 +1,182 @@
+"""
+Purpose autocomplete.
+
+Each worker process keeps, per user, a sorted index of the purposes they have
+used, so the purposes starting with a prefix are one binary search away.
+Suggestions are ranked by decayed frequency: every use counts
+2 ** (-age / SUGGESTIONS_HALF_LIFE_DAYS), so a purpose used weekly this month
+outranks one used daily last year. Weights are kept relative to the day the
+index was built, which ranks them as if decayed to today without ever
+rescaling them.
+
+Indexes are built lazily from one grouped query over the hot transaction
+table (archived transactions are old enough to weigh next to nothing), kept
+in an LRU of SUGGESTIONS_CACHE_SIZE users and patched when the process itself
+writes a transaction. As with balance_index, other processes' writes bump a
+version number per user in the shared cache, and an index whose version is
+out of date is rebuilt on its next read.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.transaction import on_commit
+from django.db.models import Count
+
+from .models import Transaction
+
+GENERATION_KEY = 'suggestions-generation'
+# Sorts after any continuation of a prefix
+_END = chr(0x10FFFF)
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def normalize(text):
+    """Purposes differing only in case or spacing are one suggestion."""
+    return re.sub(r'\s+', ' ', text.casefold()).lstrip()
+
+
+class PurposeIndex:
+    """A user's purposes in normalized order, with the decayed weight of their uses."""
+
+    def __init__(self, reference, uses, version):
+        self.reference = reference
+        self.version = version
+        # {normalized: {purpose as written: [uses, weight]}}
+        self.variants = {}
+        self.weights = {}
+        for purpose, day, count in uses:
+            key = normalize(purpose)
+            if key:
+                self._add(key, purpose, day, count)
+        self.keys = sorted(self.variants)
+
+    def _weight(self, day):
+        # Future-dated uses weigh like today's: far enough ahead, the power overflows
+        return 2 ** min(0, (day - self.reference).days / settings.SUGGESTIONS_HALF_LIFE_DAYS)
+
+    def _add(self, key, purpose, day, count):
+        weight = count * self._weight(day)
+        variants = self.variants.setdefault(key, {})
+        variant = variants.setdefault(purpose, [0, 0.0])
+        variant[0] += count
+        variant[1] += weight
+        self.weights[key] = self.weights.get(key, 0.0) + weight
+        if variant[0] <= 0:
+            del variants[purpose]
+            if variants:
+                # Start the total afresh rather than keep float residue from the removed uses
+                self.weights[key] = sum(weight for _, weight in variants.values())
+            else:
+                del self.variants[key], self.weights[key]
+
+    def add(self, purpose, day, count=1):
+        """Add `count` uses of `purpose` on `day`, or remove them if negative."""
+        key = normalize(purpose)
+        if not key:
+            return
+        existed = key in self.variants
+        self._add(key, purpose, day, count)
+        if key in self.variants and not existed:
+            insort(self.keys, key)
+        elif existed and key not in self.variants:
+            del self.keys[bisect_left(self.keys, key)]
+
+    def suggest(self, prefix, limit):
+        """The `limit` heaviest purposes starting with `prefix`, as most often written."""
+        prefix = normalize(prefix)
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _END, lo)
+        best = heapq.nlargest(limit, (self.keys[i] for i in range(lo, hi)), key=self.weights.__getitem__)
+        return [max(self.variants[key].items(), key=lambda item: item[1][1])[0] for key in best]
+
+
+def _cache():
+    return caches[settings.SUGGESTIONS_CACHE]
+
+
+def _version_key(user_id):
+    return f'suggestions-version:{user_id}'
+
+
+def _current_version(user_id):
+    versions = _cache().get_many([GENERATION_KEY, _version_key(user_id)])
+    return versions.get(GENERATION_KEY, 0), versions.get(_version_key(user_id), 0)
+
+
+def _bump(key):
+    try:
+        return _cache().incr(key)
+    except ValueError:
+        _cache().set(key, 1, None)
+        return 1
+
+
+def _build(user, version):
+    uses = (
+        Transaction.objects.filter(user=user)
+        .exclude(purpose='')
+        .values_list('purpose', 'date')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    return PurposeIndex(date.today(), uses, version)
+
+
+def get_index(user):
+    version = _current_version(user.pk)
+    with _lock:
+        index = _indexes.get(user.pk)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(user.pk)
+            return index
+
+    index = _build(user, version)
+    with _lock:
+        _indexes[user.pk] = index
+        _indexes.move_to_end(user.pk)
+        while len(_indexes) > settings.SUGGESTIONS_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def suggest(user, prefix, limit):
+    index = get_index(user)
+    with _lock:
+        return index.suggest(prefix, limit)
+
+
+def record_transaction(user, transaction, removed=False):
+    """Apply a created (or removed) transaction to this process's index and tell the others, once the write commits."""
+    # A rolled-back (or retried, see serialized_write) write must not patch the index
+    on_commit(lambda: _apply(user, transaction, removed))
+
+
+def _apply(user, transaction, removed):
+    generation, _ = _current_version(user.pk)
+    user_version = _bump(_version_key(user.pk))
+    with _lock:
+        index = _indexes.get(user.pk)
+        # Patch in place only if no other write happened since the index was read
+        if index is not None and index.version == (generation, user_version - 1):
+            index.add(transaction.purpose, transaction.date, -1 if removed else 1)
+            index.version = (generation, user_version)
+        else:
+            _indexes.pop(user.pk, None)
+
+
+def invalidate_many(user_ids):
+    """Force a rebuild of these users' indexes."""
+    # No process holds more indexes than this, so past it rebuilding them all is cheaper
+    if len(user_ids) > settings.SUGGESTIONS_CACHE_SIZE:
+        _bump(GENERATION_KEY)
+    else:
+        for user_id in user_ids:
+            _bump(_version_key(user_id))
@@ -1,3 +1,427 @@
-from django.test import TestCase
+import random
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db.models import Q, Sum
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import User
+from jobs import queue
+from jobs.models import Job
+from . import archive, balance_index, reports, suggestions
+from .balance_index import FenwickTree
+from .balances import closing_balance, repair
+from .models import (
+    ArchiveWatermark, IdempotencyKey, MonthlyBalance, RecurringRule, Transaction, TransactionArchive,
+)
+from .recurring import due_dates, first_occurrence, materialize_due
+
+
+def naive_balance(user, day):
+    """The balance at the end of `day`, summed from scratch."""
+    months = MonthlyBalance.objects.filter(user=user).filter(
+        Q(year__lt=day.year) | Q(year=day.year, month__lte=day.month)
+    )
+    monthly_income = months.aggregate(total=Sum('monthly_income'))['total'] or 0
+    net = sum(
+        t.amount if t.transaction_type == 'income' else -t.amount
+        for t in Transaction.objects.covering(user, date__lte=day)
+    )
+    return user.initial_balance + monthly_income + net
+
+
+def month_end(year, month):
+    return (date(year, month, 1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+class TransactionsTestCase(TestCase):
+    def setUp(self):
+        # Caches and per-process indexes outlive each test's rollback, which reuses ids
+        for cache in caches.all():
+            cache.clear()
+        balance_index._indexes.clear()
+        suggestions._indexes.clear()
+        self.user = self.make_user('a')
+        self.client = self.client_for(self.user)
+
+    def make_user(self, name):
+        return User.objects.create_user(
+            username=name, email=f'{name}@example.com', password='pw123456', initial_balance=Decimal('1000.00'),
+        )
+
+    def client_for(self, user, **headers):
+        client = APIClient(SERVER_NAME='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}', **headers)
+        return client
+
+    def write(self, method, path, data=None, client=None):
+        # TestCase never commits, so run the on_commit index patches and job inserts by hand
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(client or self.client, method)(path, data, format='json')
+
+    def add(self, day, amount, transaction_type='expense', purpose=''):
+        return Transaction.objects.create(
+            user=self.user, transaction_type=transaction_type, amount=Decimal(amount), date=day, purpose=purpose,
+        )
+
+
+class BalanceTestCase(TransactionsTestCase):
+    """Six months of checkpoints and transactions."""
+
+    def setUp(self):
+        super().setUp()
+        for month in range(1, 7):
+            MonthlyBalance.objects.create(user=self.user, year=2024, month=month, monthly_income=100)
+        rng = random.Random(7)
+        for i in range(60):
+            self.add(
+                date(2024, 1, 1) + timedelta(days=i * 3),
+                Decimal(rng.randint(100, 9000)) / 100,
+                'income' if i % 4 == 0 else 'expense',
+            )
+        repair(self.user)
+
+    def assertBalancesMatch(self, days):
+        for day in days:
+            response = self.client.get('/api/transactions/balance/on-date/', {'date': day.isoformat()})
+            self.assertEqual(response.status_code, 200)
+            self.assertAlmostEqual(response.json()['balance'], float(naive_balance(self.user, day)), places=6, msg=day)
+
+    def assertCheckpointsMatch(self):
+        previous = self.user.initial_balance
+        for mb in MonthlyBalance.objects.filter(user=self.user).order_by('year', 'month'):
+            self.assertFalse(mb.is_stale)
+            self.assertEqual(mb.starting_balance, previous)
+            self.assertEqual(mb.current_balance, naive_balance(self.user, month_end(mb.year, mb.month)))
+            previous = mb.current_balance
+
+
+class FenwickTreeTests(TestCase):
+    def test_prefix_sums_match_a_naive_sum(self):
+        rng = random.Random(3)
+        values = [rng.randint(-50, 50) for _ in range(500)]
+        tree = FenwickTree(values)
+        for _ in range(200):
+            i, delta = rng.randrange(500), rng.randint(-5, 5)
+            tree.add(i, delta)
+            values[i] += delta
+            j = rng.randrange(-1, 500)
+            self.assertEqual(tree.prefix_sum(j), sum(values[:j + 1]))
+        self.assertEqual(tree.prefix_sum(5000), sum(values))
+
+
+class BalanceOnDateTests(BalanceTestCase):
+    days = [
+        date(2023, 12, 31), date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 29),
+        date(2024, 3, 1), date(2024, 4, 17), date(2024, 6, 30), date(2024, 9, 1),
+    ]
+
+    def test_matches_a_naive_sum(self):
+        self.assertBalancesMatch(self.days)
+
+    def test_matches_after_back_dated_writes_and_deletes(self):
+        self.assertBalancesMatch(self.days)
+        response = self.write('post', '/api/transactions/', {
+            'transaction_type': 'expense', 'amount': '75.00', 'date': '2024-02-10', 'purpose': 'Late bill',
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertBalancesMatch(self.days)
+
+        first = Transaction.objects.filter(user=self.user).earliest('date')
+        self.assertEqual(self.write('delete', f'/api/transactions/{first.pk}/delete/').status_code, 204)
+        self.assertBalancesMatch(self.days)
+
+    def test_series_matches_a_naive_sum(self):
+        response = self.client.get('/api/transactions/balance/series/', {'start': '2024-02-20', 'end': '2024-03-10'})
+        rows = response.json()['balances']
+        self.assertEqual(len(rows), 20)
+        for row in rows:
+            self.assertAlmostEqual(row['balance'], float(naive_balance(self.user, date.fromisoformat(row['date']))))
+
+
+class CheckpointRepairTests(BalanceTestCase):
+    def test_back_dated_write_marks_later_months_stale(self):
+        self.write('post', '/api/transactions/', {'transaction_type': 'income', 'amount': '40.00', 'date': '2024-03-05'})
+        stale = MonthlyBalance.objects.filter(user=self.user, is_stale=True).values_list('month', flat=True)
+        self.assertCountEqual(stale, [3, 4, 5, 6])
+        # Several months reach back, so their repair is queued too
+        self.assertEqual(Job.objects.filter(task='transactions.balances.repair_user').count(), 1)
+
+        self.assertEqual(repair(self.user), 4)
+        self.assertCheckpointsMatch()
+
+    def test_delete_repairs_the_chain(self):
+        victim = Transaction.objects.filter(user=self.user, date__month=1).first()
+        self.write('delete', f'/api/transactions/{victim.pk}/delete/')
+        self.assertTrue(MonthlyBalance.objects.get(user=self.user, month=1).is_stale)
+
+        response = self.client.get('/api/transactions/dashboard/')
+        self.assertAlmostEqual(response.json()['current_balance'], float(naive_balance(self.user, date(2024, 6, 30))))
+        self.assertCheckpointsMatch()
+
+    def test_deferred_repair_reads_without_writing(self):
+        self.add(date(2024, 2, 2), '12.34')
+        MonthlyBalance.objects.filter(user=self.user, month__gte=2).update(is_stale=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            balance = closing_balance(self.user, defer_repair=True)
+        self.assertEqual(balance, naive_balance(self.user, date(2024, 6, 30)))
+        self.assertEqual(MonthlyBalance.objects.filter(user=self.user, is_stale=True).count(), 5)
+        self.assertTrue(Job.objects.filter(task='transactions.balances.repair_user').exists())
+        self.assertEqual(closing_balance(self.user), balance)
+
+
+class RecurringScheduleTests(TestCase):
+    def occurrences(self, until, **fields):
+        rule = RecurringRule(transaction_type='expense', amount=1, **fields)
+        rule.next_date = first_occurrence(rule)
+        return due_dates(rule, until), rule
+
+    def test_monthly_on_the_31st_falls_back_to_the_last_day(self):
+        dates, _ = self.occurrences(date(2024, 4, 30), frequency='monthly', start_date=date(2024, 1, 31))
+        self.assertEqual(dates, [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)])
+
+    def test_monthly_month_day_and_interval(self):
+        dates, _ = self.occurrences(
+            date(2026, 6, 30), frequency='monthly', start_date=date(2026, 1, 15), month_day=31, interval=2,
+        )
+        self.assertEqual(dates, [date(2026, 1, 31), date(2026, 3, 31), date(2026, 5, 31)])
+
+    def test_weekly_on_several_weekdays_every_other_week(self):
+        dates, _ = self.occurrences(
+            date(2026, 10, 31), frequency='weekly', start_date=date(2026, 10, 1), weekdays=[0, 4], interval=2,
+        )
+        self.assertEqual(dates, [
+            date(2026, 10, 2), date(2026, 10, 12), date(2026, 10, 16), date(2026, 10, 26), date(2026, 10, 30),
+        ])
+
+    def test_weekly_starting_after_the_weekday(self):
+        dates, _ = self.occurrences(date(2026, 10, 12), frequency='weekly', start_date=date(2026, 10, 3), weekdays=[0])
+        self.assertEqual(dates, [date(2026, 10, 5), date(2026, 10, 12)])
+
+    def test_end_date_stops_the_rule(self):
+        dates, rule = self.occurrences(
+            date(2026, 12, 31), frequency='daily', start_date=date(2026, 12, 1), interval=10, end_date=date(2026, 12, 21),
+        )
+        self.assertEqual(dates, [date(2026, 12, 1), date(2026, 12, 11), date(2026, 12, 21)])
+        self.assertIsNone(rule.next_date)
+
+
+class MaterializeRecurringTests(TransactionsTestCase):
+    def make_rule(self, **fields):
+        rule = RecurringRule(user=self.user, transaction_type='expense', amount=5, **fields)
+        rule.next_date = first_occurrence(rule)
+        rule.save()
+        return rule
+
+    def test_occurrences_are_created_once_even_when_replayed(self):
+        rule = self.make_rule(frequency='monthly', start_date=date(2026, 8, 31), end_date=date(2026, 11, 15))
+        MonthlyBalance.objects.create(user=self.user, year=2026, month=9, is_stale=False)
+
+        self.assertEqual(materialize_due(date(2026, 12, 31)), (1, 3, 1))
+        dates = Transaction.objects.filter(recurring_rule=rule).values_list('date', flat=True)
+        self.assertCountEqual(dates, [date(2026, 8, 31), date(2026, 9, 30), date(2026, 10, 31)])
+        rule.refresh_from_db()
+        self.assertIsNone(rule.next_date)
+        self.assertTrue(MonthlyBalance.objects.get(user=self.user).is_stale)
+
+        # A crashed or overlapping run replays occurrences that already exist
+        RecurringRule.objects.filter(pk=rule.pk).update(next_date=date(2026, 8, 31))
+        materialize_due(date(2026, 12, 31))
+        self.assertEqual(Transaction.objects.filter(recurring_rule=rule).count(), 3)
+
+    def test_api_rejects_invalid_weekdays(self):
+        response = self.client.post('/api/transactions/recurring/', {
+            'transaction_type': 'expense', 'amount': '5', 'frequency': 'weekly', 'weekdays': [9],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class IdempotencyTests(TransactionsTestCase):
+    body = {'transaction_type': 'expense', 'amount': '12.50', 'purpose': 'Lunch'}
+
+    def test_retry_with_the_same_key_is_replayed(self):
+        client = self.client_for(self.user, HTTP_IDEMPOTENCY_KEY='k1')
+        first = self.write('post', '/api/transactions/', self.body, client=client)
+        again = self.write('post', '/api/transactions/', self.body, client=client)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((again.status_code, again.json()), (201, first.json()))
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_reused_for_a_different_request_is_refused(self):
+        client = self.client_for(self.user, HTTP_IDEMPOTENCY_KEY='k1')
+        self.write('post', '/api/transactions/', self.body, client=client)
+        response = self.write('post', '/api/transactions/', {**self.body, 'amount': '13.00'}, client=client)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_requests_without_a_key_are_not_deduplicated(self):
+        self.write('post', '/api/transactions/', self.body)
+        self.write('post', '/api/transactions/', self.body)
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_BUCKETS={'aggregates': {'capacity': 5, 'rate': 0.001}})
+class ThrottleTests(TransactionsTestCase):
+    def test_spent_bucket_is_refused_with_429(self):
+        response = self.client.get('/api/transactions/cumulative-balance/')
+        self.assertEqual((response['X-RateLimit-Limit'], response['X-RateLimit-Remaining']), ('5', '2'))
+        self.assertEqual(self.client.get('/api/transactions/dashboard/').status_code, 200)
+
+        response = self.client.get('/api/transactions/cumulative-balance/')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_buckets_are_per_user_and_endpoint_class(self):
+        for _ in range(2):
+            self.client.get('/api/transactions/cumulative-balance/')
+        other = self.client_for(self.make_user('b'))
+        self.assertEqual(other.get('/api/transactions/dashboard/').status_code, 200)
+        # Unthrottled endpoints ignore the spent bucket
+        response = self.client.get('/api/transactions/history/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-RateLimit-Remaining', response)
+
+
+class SearchTests(TransactionsTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(7):
+            self.add(date(2024, 1, 1) + timedelta(days=i % 4), '4.50', purpose='Coffee beans')
+        self.add(date(2024, 1, 2), '30.00', purpose='Groceries')
+        other = self.make_user('b')
+        Transaction.objects.create(user=other, transaction_type='expense', amount=1, purpose='Coffee beans')
+
+    def pages(self, **params):
+        results, cursor = [], None
+        while True:
+            query = {'q': 'cof', 'limit': 3, **params}
+            if cursor:
+                query['cursor'] = cursor
+            body = self.client.get('/api/transactions/search/', query).json()
+            results.append([row['id'] for row in body['results']])
+            cursor = body['next']
+            if cursor is None:
+                return results
+
+    def test_keyset_pages_cover_every_match_once(self):
+        pages = self.pages()
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        ids = [pk for page in pages for pk in page]
+        expected = Transaction.objects.filter(user=self.user, purpose='Coffee beans').order_by('-date', '-id')
+        # Equal ranks fall back to newest first
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+
+    def test_pages_respect_filters(self):
+        ids = [pk for page in self.pages(start='2024-01-03') for pk in page]
+        self.assertCountEqual(
+            ids, Transaction.objects.filter(user=self.user, purpose='Coffee beans', date__gte=date(2024, 1, 3)).values_list('id', flat=True),
+        )
+
+    def test_invalid_cursor_is_refused(self):
+        response = self.client.get('/api/transactions/search/', {'q': 'coffee', 'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReportTests(TransactionsTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media, JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_BASE_DELAY=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.add(date(2024, 1, 5), '10.00', purpose='Books')
+
+    def submit(self, kind='statement', params=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return reports.submit(self.user, kind, params or {})
+
+    def drain(self):
+        while (job := queue.claim('test')) is not None:
+            queue.run(job)
+
+    def test_identical_submissions_share_a_job_until_the_data_changes(self):
+        job, created = self.submit()
+        self.assertTrue(created)
+        self.assertEqual(self.submit(), (job, False))
+        self.drain()
+        self.assertEqual(self.submit()[0].pk, job.pk)
+
+        self.add(date(2024, 1, 6), '3.00')
+        changed, created = self.submit()
+        self.assertTrue(created)
+        self.assertNotEqual(changed.pk, job.pk)
+
+    def test_finished_report_is_downloadable(self):
+        job, _ = self.submit()
+        self.drain()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress), ('done', 100))
+        response = self.client.get(f'/api/transactions/reports/{job.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'2024-01-05,expense,10.00', b''.join(response.streaming_content))
+
+    def test_invalid_parameters_fail_without_retrying(self):
+        job, _ = self.submit(params={'start': 'not-a-date'})
+        self.drain()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('not-a-date', job.error)
+        self.assertEqual(Job.objects.get().attempts, 1)
+
+    def test_other_errors_are_retried_then_fail_the_report(self):
+        job, _ = self.submit()
+        broken = mock.Mock(side_effect=OSError('disk full'))
+        with mock.patch.dict(reports.BUILDERS, statement=broken):
+            self.drain()
+        self.assertEqual(broken.call_count, 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(Job.objects.get().status, 'failed')
+
+        # A failed report is computed afresh when submitted again
+        again, created = self.submit()
+        self.assertTrue(created)
+        self.drain()
+        again.refresh_from_db()
+        self.assertEqual(again.status, 'done')
+
+    def test_missing_file_fails_the_report(self):
+        job, _ = self.submit()
+        self.drain()
+        job.refresh_from_db()
+        job.file.delete(save=False)
+        response = self.client.get(f'/api/transactions/reports/{job.pk}/download/')
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(self.submit()[1])
+
+
+@override_settings(TRANSACTION_ARCHIVE_AFTER_DAYS=365)
+class ArchiveTests(TransactionsTestCase):
+    def test_cutoff_is_persisted_and_never_lowered(self):
+        self.assertEqual(archive.archive_cutoff(), date.min)
+        old = self.add(date(2020, 1, 5), '5.00')
+        self.assertEqual(archive.archive_transactions(), 1)
+        cutoff = ArchiveWatermark.objects.get().cutoff
+        self.assertEqual(archive.archive_cutoff(), cutoff)
+        self.assertTrue(TransactionArchive.objects.filter(pk=old.pk).exists())
+
+        with override_settings(TRANSACTION_ARCHIVE_AFTER_DAYS=365 * 20):
+            archive.archive_transactions()
+        self.assertEqual(archive.archive_cutoff(), cutoff)
+        self.assertEqual(naive_balance(self.user, date(2020, 12, 31)), Decimal('995.00'))
+
+    def test_archived_transactions_can_be_deleted(self):
+        old = self.add(date(2020, 1, 5), '5.00')
+        archive.archive_transactions()
+        self.assertEqual(self.write('delete', f'/api/transactions/{old.pk}/delete/').status_code, 204)
+        self.assertFalse(TransactionArchive.objects.exists())
+        self.assertEqual(self.write('delete', f'/api/transactions/{old.pk}/delete/').status_code, 404)
@@ -1,19 +1,37 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+    read_views = async_views
+    notification_list = async_views.notification_list
+else:
+    read_views = views
+    notification_list = views.NotificationListView.as_view()
+
 urlpatterns = [
     path('', views.TransactionListCreateView.as_view(), name='transaction-list-create'),
     path('history/', views.TransactionHistoryView.as_view(), name='transaction-history'),
-    path('dashboard/', views.dashboard_data, name='dashboard-data'),
+    path('search/', views.search_transactions, name='transaction-search'),
+    path('suggestions/', views.purpose_suggestions, name='purpose-suggestions'),
+    path('dashboard/', read_views.dashboard_data, name='dashboard-data'),
     path('statistics/', views.user_statistics, name='user-statistics'),
-    path('notifications/', views.NotificationListView.as_view(), name='notifications'),
+    path('notifications/', notification_list, name='notifications'),
     path('<int:pk>/delete/', views.TransactionDeleteView.as_view(), name='transaction-delete'),
-    path('monthly/<int:year>/<int:month>/', views.monthly_statistics, name='monthly-statistics'),
+    path('monthly/<int:year>/<int:month>/', read_views.monthly_statistics, name='monthly-statistics'),
     path('monthly-income/', views.monthly_income_management, name='monthly-income-management'),
-    path('cumulative-balance/', views.cumulative_balance_history, name='cumulative-balance-history'),
+    path('balance/on-date/', views.balance_on_date, name='balance-on-date'),
+    path('balance/series/', views.balance_series, name='balance-series'),
+    path('cumulative-balance/', read_views.cumulative_balance_history, name='cumulative-balance-history'),
     path('daily-expense/check/', views.check_daily_expense_usage, name='check-daily-expense'),
     path('daily-expense/mark/', views.mark_daily_expense_used, name='mark-daily-expense'),
     path('daily-expense/add/', views.add_daily_expense_for_date, name='add-daily-expense'),
+    path('recurring/', views.RecurringRuleListCreateView.as_view(), name='recurring-rule-list-create'),
+    path('recurring/<int:pk>/', views.RecurringRuleDetailView.as_view(), name='recurring-rule-detail'),
+    path('reports/', views.ReportJobListCreateView.as_view(), name='report-list-create'),
+    path('reports/<int:pk>/', views.ReportJobDetailView.as_view(), name='report-detail'),
+    path('reports/<int:pk>/download/', views.download_report, name='report-download'),
     path('user-activity/', views.check_user_activity, name='check-user-activity'),
     path('monthly-goals/', views.monthly_goal_management, name='monthly-goal-management'),
 ]
\ No newline at end of file
@@ -1,90 +1,137 @@
 from rest_framework import generics, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.db.models import Count, Q, Sum
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from django.utils import timezone
-from django.db import models
 from datetime import timedelta, date
-from .models import Transaction, Notification, MonthlyBalance, MonthlyGoal
-from .serializers import TransactionSerializer, NotificationSerializer, MonthlyBalanceSerializer
+from expenso_backend.db_router import replica_reads
+from expenso_backend.renderers import ColumnarJSONRenderer
+from expenso_backend.sparse_fields import SparseFieldsetsViewMixin, sparse_fields
+from expenso_backend.sqlite import serialized_write
+from expenso_backend.throttling import token_bucket
+from . import balance_index, filters, reports, search, suggestions
+from .aggregates import totals, monthly_totals
+from .balances import closing_balance, mark_stale, repair
+from .idempotency import idempotent
+from .models import Transaction, TransactionArchive, Notification, MonthlyBalance, MonthlyGoal, RecurringRule, ReportJob
+from .recurring import first_occurrence, next_occurrence
+from .serializers import (
+    TransactionSerializer, NotificationSerializer, MonthlyBalanceSerializer, RecurringRuleSerializer, ReportJobSerializer,
+    transaction_values,
+)
+
+# How list views encode each transaction field in the columnar format
+TRANSACTION_COLUMNS = {
+    'id': 'delta',
+    'transaction_type': 'dictionary',
+    'amount': 'decimal',
+    'currency': 'dictionary',
+    'purpose': 'dictionary',
+    'date': 'date-delta',
+    'created_at': 'timestamp-delta',
+}
+
+# Transactions per page of a paged list, at most
+MAX_LIST_LIMIT = 500
+
+def _page(request):
+    """(offset, limit or None) of the requested page of a list."""
+    try:
+        offset = int(request.GET.get('offset', 0))
+        limit = int(request.GET['limit']) if request.GET.get('limit') else None
+    except ValueError:
+        raise ValueError('offset and limit must be whole numbers')
+    if offset < 0 or limit is not None and not 1 <= limit <= MAX_LIST_LIMIT:
+        raise ValueError(f'offset must be 0 or more, and limit between 1 and {MAX_LIST_LIMIT}')
+    return offset, limit
 
 class TransactionListCreateView(generics.ListCreateAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    columnar_encodings = TRANSACTION_COLUMNS
     
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user)
+        return Transaction.objects.covering(self.request.user)
+    
+    def list(self, request, *args, **kwargs):
+        fieldset = sparse_fields(request, TransactionSerializer)
+        try:
+            lookups = filters.lookups(filters.parse(request.GET))
+            ordering = filters.ordering(request.GET)
+            offset, limit = _page(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        
+        user = request.user
+        queryset = Transaction.objects.covering(user, **lookups).order_by(*ordering)
+        stop = None if limit is None else offset + limit
+        response = Response(transaction_values.serialize(queryset[offset:stop], fieldset))
+        if request.GET.get('totals') in ('1', 'true'):
+            count, income, expenses = totals(user, **lookups)
+            response['X-Total-Count'] = count
+            response['X-Total-Income'] = f'{income:.2f}'
+            response['X-Total-Expenses'] = f'{expenses:.2f}'
+        return response
+    
+    @serialized_write
+    @method_decorator(idempotent)
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        instance = serializer.save(user=self.request.user)
+        mark_stale(self.request.user, instance.date.year, instance.date.month)
+        balance_index.record_transaction(self.request.user, instance)
+        suggestions.record_transaction(self.request.user, instance)
 
 class TransactionHistoryView(generics.ListAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    columnar_encodings = TRANSACTION_COLUMNS
+    use_replica = True
     
     def get_queryset(self):
         two_months_ago = timezone.now() - timedelta(days=60)
-        return Transaction.objects.filter(
-            user=self.request.user,
+        return Transaction.objects.covering(
+            self.request.user,
             date__gte=two_months_ago
         )
+    
+    def list(self, request, *args, **kwargs):
+        fieldset = sparse_fields(request, TransactionSerializer)
+        return Response(transaction_values.serialize(self.filter_queryset(self.get_queryset()), fieldset))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([token_bucket('aggregates', cost=1)])
 def dashboard_data(request):
     user = request.user
     today = timezone.now().date()
     
     # Today's spending
-    today_expenses = Transaction.objects.filter(
-        user=user,
-        transaction_type='expense',
-        date=today
-    ).aggregate(total=models.Sum('amount'))['total'] or 0
-    
-    # Calculate cumulative balance from all months
-    cumulative_balance = user.initial_balance
-    total_monthly_income = 0
+    _, _, today_expenses = totals(user, date=today)
     
-    # Get all monthly balances for this user
-    monthly_balances = MonthlyBalance.objects.filter(user=user).order_by('year', 'month')
+    # Cumulative balance is the closing balance of the latest month
+    cumulative_balance = closing_balance(user)
     
-    for mb in monthly_balances:
-        # Add monthly income
-        cumulative_balance += mb.monthly_income
-        total_monthly_income += mb.monthly_income
-        
-        # Add transaction income and subtract expenses for this month
-        month_transactions = Transaction.objects.filter(
-            user=user,
-            date__year=mb.year,
-            date__month=mb.month
-        )
-        
-        month_income = month_transactions.filter(transaction_type='income').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        month_expenses = month_transactions.filter(transaction_type='expense').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        
-        cumulative_balance += month_income - month_expenses
+    summary = MonthlyBalance.objects.filter(user=user).aggregate(
+        total_monthly_income=Sum('monthly_income'),
+        has_current_month=Count('id', filter=Q(year=today.year, month=today.month)),
+    )
+    total_monthly_income = summary['total_monthly_income'] or 0
     
     # Handle current month if no MonthlyBalance exists
-    current_month_balance = MonthlyBalance.objects.filter(
-        user=user, year=today.year, month=today.month
-    ).first()
-    
-    if not current_month_balance:
-        current_month_transactions = Transaction.objects.filter(
-            user=user,
-            date__year=today.year,
-            date__month=today.month
+    if not summary['has_current_month']:
+        _, current_month_income, current_month_expenses = totals(
+            user, date__year=today.year, date__month=today.month
         )
-        
-        current_month_income = current_month_transactions.filter(transaction_type='income').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        current_month_expenses = current_month_transactions.filter(transaction_type='expense').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        
         cumulative_balance += current_month_income - current_month_expenses
     
     return Response({
@@ -97,24 +144,18 @@ def dashboard_data(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([token_bucket('aggregates', cost=1)])
 def user_statistics(request):
     user = request.user
     monthly_income = request.data.get('monthly_income', 0)
     
     # Get current month data
     current_date = timezone.now().date()
-    current_month_transactions = Transaction.objects.filter(
-        user=user,
-        date__year=current_date.year,
-        date__month=current_date.month
-    )
     
     # Calculate current month statistics
-    total_transactions = current_month_transactions.count()
-    total_addon = current_month_transactions.filter(transaction_type='income').aggregate(
-        total=models.Sum('amount'))['total'] or 0
-    total_expenses = current_month_transactions.filter(transaction_type='expense').aggregate(
-        total=models.Sum('amount'))['total'] or 0
+    total_transactions, total_addon, total_expenses = totals(
+        user, date__year=current_date.year, date__month=current_date.month
+    )
     
     # Calculate current balance using monthly income (same as history page)
     current_balance = float(monthly_income) + float(total_addon) - float(total_expenses)
@@ -126,13 +167,82 @@ def user_statistics(request):
         'current_balance': current_balance
     })
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(SparseFieldsetsViewMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
 
+class RecurringRuleListCreateView(SparseFieldsetsViewMixin, generics.ListCreateAPIView):
+    serializer_class = RecurringRuleSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return RecurringRule.objects.filter(user=self.request.user)
+    
+    @serialized_write
+    def perform_create(self, serializer):
+        # Occurrences from a start date in the past are filled in by the next run
+        rule = serializer.save(user=self.request.user)
+        rule.next_date = first_occurrence(rule)
+        rule.save(update_fields=['next_date'])
+
+class RecurringRuleDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = RecurringRuleSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return RecurringRule.objects.filter(user=self.request.user)
+    
+    @serialized_write
+    def perform_update(self, serializer):
+        # Changes apply from today on; past occurrences are left as they are
+        rule = serializer.save()
+        rule.next_date = next_occurrence(rule, max(rule.start_date, date.today()))
+        rule.save(update_fields=['next_date'])
+
+class ReportJobListCreateView(SparseFieldsetsViewMixin, generics.ListCreateAPIView):
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return ReportJob.objects.filter(user=self.request.user)
+    
+    @serialized_write
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job, created = reports.submit(request.user, **serializer.validated_data)
+        # An identical report of the same data is returned rather than computed again
+        return Response(
+            self.get_serializer(job).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
+
+class ReportJobDetailView(SparseFieldsetsViewMixin, generics.RetrieveAPIView):
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return ReportJob.objects.filter(user=self.request.user)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_report(request, pk):
+    job = ReportJob.objects.filter(user=request.user, pk=pk, status='done').first()
+    if job is None:
+        return Response({'error': 'Report not found or not ready'}, status=404)
+    try:
+        report = job.file.open('rb')
+    except FileNotFoundError:
+        # Lost with the disk it was on; failing the job lets submitting it again rebuild it
+        ReportJob.objects.filter(pk=job.pk, status='done').update(
+            status='failed', error='Report file missing', finished_at=timezone.now(),
+        )
+        return Response({'error': 'Report file missing, submit it again'}, status=404)
+    return FileResponse(report, as_attachment=True, filename=job.file.name.rsplit('/', 1)[-1])
+
 class TransactionDeleteView(generics.DestroyAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
@@ -140,8 +250,26 @@ class TransactionDeleteView(generics.DestroyAPIView):
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user)
 
+    def get_object(self):
+        # Old transactions live in the archive table and are deleted from there
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        instance = (
+            self.get_queryset().filter(pk=lookup).first()
+            or get_object_or_404(TransactionArchive, user=self.request.user, pk=lookup)
+        )
+        self.check_object_permissions(self.request, instance)
+        return instance
+    
+    @serialized_write
+    def perform_destroy(self, instance):
+        balance_index.record_transaction(self.request.user, instance, removed=True)
+        suggestions.record_transaction(self.request.user, instance, removed=True)
+        instance.delete()
+        mark_stale(self.request.user, instance.date.year, instance.date.month)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([token_bucket('aggregates', cost=2)])
 def monthly_statistics(request, year, month):
     user = request.user
     monthly_income = request.data.get('monthly_income', 0)
@@ -179,45 +307,22 @@ def monthly_statistics(request, year, month):
         monthly_balance.monthly_income = monthly_income
         monthly_balance.save()
     
-    transactions = Transaction.objects.filter(
-        user=user,
+    # A new month or a changed income moves the balance of every later month
+    if created or monthly_income:
+        mark_stale(user, year, month)
+    repair(user)
+    monthly_balance.refresh_from_db(fields=['starting_balance', 'current_balance'])
+    
+    transactions = Transaction.objects.covering(
+        user,
         date__year=year,
         date__month=month
     )
     
-    total_transactions = transactions.count()
-    total_addon = transactions.filter(transaction_type='income').aggregate(
-        total=models.Sum('amount'))['total'] or 0
-    total_expenses = transactions.filter(transaction_type='expense').aggregate(
-        total=models.Sum('amount'))['total'] or 0
+    total_transactions, total_addon, total_expenses = totals(user, date__year=year, date__month=month)
     
-    # Calculate current cumulative balance
-    cumulative_balance = user.initial_balance
-    
-    # Add all monthly incomes and transaction balances up to current month
-    all_monthly_balances = MonthlyBalance.objects.filter(
-        user=user,
-        year__lt=year
-    ) | MonthlyBalance.objects.filter(
-        user=user,
-        year=year,
-        month__lte=month
-    )
-    
-    for mb in all_monthly_balances.order_by('year', 'month'):
-        cumulative_balance += mb.monthly_income
-        
-        # Add transaction net for each month
-        month_txns = Transaction.objects.filter(
-            user=user,
-            date__year=mb.year,
-            date__month=mb.month
-        )
-        month_income = month_txns.filter(transaction_type='income').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        month_expenses = month_txns.filter(transaction_type='expense').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        cumulative_balance += month_income - month_expenses
+    # Cumulative balance up to this month is its closing checkpoint
+    cumulative_balance = monthly_balance.current_balance
     
     return Response({
         'monthly_income': float(monthly_balance.monthly_income),
@@ -225,7 +330,7 @@ def monthly_statistics(request, year, month):
         'total_addon': float(total_addon),
         'total_expenses': float(total_expenses),
         'current_balance': float(cumulative_balance),
-        'transactions': TransactionSerializer(transactions, many=True).data
+        'transactions': transaction_values.serialize(transactions)
     })
 
 @api_view(['POST'])
@@ -243,8 +348,8 @@ def check_daily_expense_usage(request):
         target_date = date.today()
     
     # Check if daily expense exists for the target date
-    daily_expense_exists = Transaction.objects.filter(
-        user=user,
+    daily_expense_exists = Transaction.objects.covering(
+        user,
         date=target_date,
         purpose='Daily Expense'
     ).exists()
@@ -256,6 +361,7 @@ def check_daily_expense_usage(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@serialized_write
 def mark_daily_expense_used(request):
     user = request.user
     today = date.today()
@@ -265,6 +371,8 @@ def mark_daily_expense_used(request):
         year=today.year,
         month=today.month
     )
+    if created:
+        mark_stale(user, today.year, today.month)
     
     today_str = today.strftime('%Y-%m-%d')
     if today_str not in monthly_balance.daily_expense_used_dates:
@@ -275,6 +383,8 @@ def mark_daily_expense_used(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@serialized_write
+@idempotent
 def add_daily_expense_for_date(request):
     user = request.user
     target_date = request.data.get('date')
@@ -287,8 +397,8 @@ def add_daily_expense_for_date(request):
     parsed_date = datetime.strptime(target_date, '%Y-%m-%d').date()
     
     # Check if daily expense already exists for this date
-    existing_expense = Transaction.objects.filter(
-        user=user,
+    existing_expense = Transaction.objects.covering(
+        user,
         date=parsed_date,
         purpose='Daily Expense'
     ).exists()
@@ -304,6 +414,9 @@ def add_daily_expense_for_date(request):
         purpose='Daily Expense',
         date=parsed_date
     )
+    mark_stale(user, parsed_date.year, parsed_date.month)
+    balance_index.record_transaction(user, transaction)
+    suggestions.record_transaction(user, transaction)
     
     return Response({
         'success': True,
@@ -348,6 +461,7 @@ def monthly_income_management(request):
         if not created:
             monthly_balance.monthly_income = monthly_income
             monthly_balance.save()
+        mark_stale(user, monthly_balance.year, monthly_balance.month)
         
         return Response({
             'success': True,
@@ -369,8 +483,10 @@ def monthly_income_management(request):
             'month': int(month)
         })
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([token_bucket('aggregates', cost=3)])
 def cumulative_balance_history(request):
     user = request.user
     
@@ -380,18 +496,11 @@ def cumulative_balance_history(request):
     cumulative_balance = user.initial_balance
     history = []
     
+    month_totals = monthly_totals(user)
+    
     for mb in monthly_balances:
         # Calculate transactions for this month
-        month_transactions = Transaction.objects.filter(
-            user=user,
-            date__year=mb.year,
-            date__month=mb.month
-        )
-        
-        month_income = month_transactions.filter(transaction_type='income').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        month_expenses = month_transactions.filter(transaction_type='expense').aggregate(
-            total=models.Sum('amount'))['total'] or 0
+        month_income, month_expenses = month_totals.get((mb.year, mb.month), (0, 0))
         
         # Add monthly income and transaction net
         cumulative_balance += mb.monthly_income + month_income - month_expenses
@@ -469,4 +578,97 @@ def monthly_goal_management(request):
             'year': year,
             'month': month,
             'is_current_month': monthly_goal and monthly_goal.year == year and monthly_goal.month == month if monthly_goal else False
-        })
\ No newline at end of file
+        })
+
+# Longest range the balance series endpoint returns
+MAX_BALANCE_SERIES_DAYS = 366
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([token_bucket('aggregates', cost=1)])
+def balance_on_date(request):
+    try:
+        day = date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        return Response({'error': 'date is required, as YYYY-MM-DD'}, status=400)
+    
+    return Response({
+        'date': day.isoformat(),
+        'balance': float(balance_index.balance_on(request.user, day))
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([token_bucket('aggregates', cost=2)])
+def balance_series(request):
+    try:
+        start = date.fromisoformat(request.GET.get('start', ''))
+        end = date.fromisoformat(request.GET.get('end', ''))
+    except ValueError:
+        return Response({'error': 'start and end are required, as YYYY-MM-DD'}, status=400)
+    
+    if end < start:
+        return Response({'error': 'end must not be before start'}, status=400)
+    if (end - start).days >= MAX_BALANCE_SERIES_DAYS:
+        return Response({'error': f'At most {MAX_BALANCE_SERIES_DAYS} days can be requested at once'}, status=400)
+    
+    series = balance_index.balance_series(request.user, start, end)
+    return Response({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'balances': [{'date': day.isoformat(), 'balance': float(balance)} for day, balance in series]
+    })
+
+# Search results per page, by default and at most
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 200
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_transactions(request):
+    text = request.GET.get('q', '')
+    if not search.terms(text):
+        return Response({'error': 'q is required'}, status=400)
+    
+    try:
+        params = filters.parse(request.GET)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=400)
+    # Search has its own purpose matching
+    params.pop('purpose', None)
+    params.pop('purpose_contains', None)
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_SEARCH_LIMIT))
+        if not 1 <= limit <= MAX_SEARCH_LIMIT:
+            raise ValueError
+    except ValueError:
+        return Response({'error': f'limit must be between 1 and {MAX_SEARCH_LIMIT}'}, status=400)
+    try:
+        after = search.decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=400)
+    
+    ids, next_cursor = search.search(request.user, text, after=after, limit=limit, **params)
+    rows = transaction_values.serialize(Transaction.objects.covering(request.user, id__in=ids))
+    by_id = {row['id']: row for row in rows}
+    return Response({
+        'results': [by_id[pk] for pk in ids if pk in by_id],
+        'next': next_cursor,
+    })
+
+
+# Purpose suggestions returned, by default and at most
+DEFAULT_SUGGESTION_LIMIT = 8
+MAX_SUGGESTION_LIMIT = 20
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def purpose_suggestions(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_SUGGESTION_LIMIT))
+        if not 1 <= limit <= MAX_SUGGESTION_LIMIT:
+            raise ValueError
+    except ValueError:
+        return Response({'error': f'limit must be between 1 and {MAX_SUGGESTION_LIMIT}'}, status=400)
+    
+    return Response({'suggestions': suggestions.suggest(request.user, request.GET.get('q', ''), limit)})
@@ -0,0 +1,12 @@
+#!/bin/bash
+# Run a server command (the arguments) alongside a background job worker.
+# When either exits, the other is stopped and this script exits with the
+# first one's status, so the platform restarts the service rather than
+# leaving it serving requests with no worker running queued jobs.
+
+python manage.py run_worker &
+"$@" &
+
+trap 'kill $(jobs -p) 2>/dev/null; wait' EXIT
+trap 'exit 143' TERM INT
+wait -n